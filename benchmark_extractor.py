@@ -0,0 +1,267 @@
+"""
+Benchmark do extractor_pdf com relatórios sintéticos.
+
+Gera texto no formato de `pdftotext -layout` esperado por extrair_dados
+(cabeçalho de página com CNPJ do condomínio, blocos de unidade com Dados
+pessoais / Dados do pagador, endereços, frações e quebras de página) e mede,
+para cada tamanho, o tempo de cada etapa, unidades/s e o pico de RSS.
+
+Cada tamanho roda em um processo novo, para que o pico de RSS seja dele.
+
+Uso:
+    python benchmark_extractor.py --tamanhos 100 1000 10000 50000
+    python benchmark_extractor.py --pdf relatorio.pdf            # inclui a etapa pdftotext
+    python benchmark_extractor.py --comparar benchmark_anterior.json
+    python benchmark_extractor.py --gerar 1000 --saida relatorio_sintetico.txt
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from extractor_pdf import OPCOES_PDFTOTEXT, ExtractorPDF, _resolver_pdftotext
+
+TAMANHOS_PADRAO = [100, 1000, 10000]
+# etapas somadas no total (caminho da CLI); salvar_excel fica só como referência do modo antigo
+ETAPAS_TOTAL = ("resolver_pdftotext", "pdftotext", "parse", "salvar_linhas")
+LINHAS_POR_PAGINA = 60
+
+NOMES = ["JOÃO DA SILVA", "MARIA APARECIDA SOUZA", "JOSÉ CARLOS AÇÃO", "ANA PAULA LIMA",
+         "CONDOMÍNIO INVESTIMENTOS LTDA", "PEDRO HENRIQUE ALVES", "LÚCIA FERNANDES"]
+RUAS = ["das Flores", "Brigadeiro Faria Lima", "São João", "Sete de Setembro", "dos Andradas"]
+TIPOS_LOGRADOURO = ["Rua", "AV", "Avenida", "AL", "Praça", "ROD", "Estrada", "Travessa"]
+BAIRROS = ["Centro", "Jardim Paulista", "Vila Mariana", "Moema", "Pinheiros"]
+CIDADES = [("São Paulo", "SP"), ("Campinas", "SP"), ("Rio de Janeiro", "RJ"), ("Curitiba", "PR")]
+TIPOS_UNIDADE = ["Apartamento", "Loja", "Sala comercial", ""]
+
+
+def _cpf(r: random.Random) -> str:
+    return f"{r.randint(100, 999)}.{r.randint(100, 999)}.{r.randint(100, 999)}-{r.randint(10, 99)}"
+
+
+def _bloco_unidade(r: random.Random, i: int) -> List[str]:
+    bloco = r.choice(["A", "B", "C", "01"])
+    unidade = f"VG{r.randint(1, 300):04d}" if r.random() < 0.1 else str(r.randint(1, 2400))
+    nome = r.choice(NOMES)
+    tipo_rua = r.choice(TIPOS_LOGRADOURO)
+    cidade, uf = r.choice(CIDADES)
+    cep = f"{r.randint(10000, 99999)}-{r.randint(100, 999)}"
+
+    linhas = [
+        f"Bloco: {bloco}    Unidade: {unidade} - {nome}                         Código do cliente: {100000 + i}",
+        "Dados pessoais",
+        f"    Tipo de pessoa: {r.choice(['Física', 'Jurídica'])}          CPF: {_cpf(r)}",
+        f"    Tipo de unidade: {r.choice(TIPOS_UNIDADE)}              Dias de prazo: {r.randint(0, 10)}",
+        f"    Classificação: {r.randint(1, 4)} - Residencial",
+        "Telefone/e-mail do cliente",
+        f"    Telefone residencial - (11) {r.randint(2000, 3999)}-{r.randint(1000, 9999)}",
+        f"    Celular - (11) 9{r.randint(1000, 9999)}-{r.randint(1000, 9999)}",
+        f"    E-mail - cliente{i}@exemplo.com.br",
+    ]
+    if r.random() < 0.3:
+        linhas.append(f"    Telefone comercial - (11) {r.randint(2000, 3999)}-{r.randint(1000, 9999)}")
+    if r.random() < 0.5:
+        linhas += [
+            "Dados do pagador",
+            f"    Tipo de pessoa: Física          CPF: {_cpf(r)}",
+            f"    Tipo de correspondência: {r.choice(['Email', 'Impresso', 'Email e impresso'])}",
+            f"    A/C: {r.choice(NOMES)}              Forma de envio: Email",
+        ]
+    linhas += [
+        "Endereço de cobrança",
+        f"    Endereço: {tipo_rua} {r.choice(RUAS)} {r.randint(1, 3000)} apto {r.randint(1, 200)}"
+        f" - {r.choice(BAIRROS)} - {cidade} - {uf} - {cep}",
+        "Rateio/frações",
+        f"    Fração unidade: {r.random():.6f}      Metragem total: {r.uniform(30, 300):.2f}"
+        f"      Área construída: {r.uniform(25, 250):.2f}",
+    ]
+    for j in sorted(r.sample(range(1, 11), r.randint(0, 3))):
+        linhas.append(f"    Fração extra {j}: {r.random():.6f}")
+    if r.random() < 0.4:
+        linhas.append(f"    Fração garagem: {r.random():.6f}")
+    linhas.append("")
+    return linhas
+
+
+def gerar_relatorio(n_unidades: int, semente: int = 42) -> str:
+    """Texto sintético de `pdftotext -layout` com n_unidades blocos de unidade."""
+    r = random.Random(semente)
+    corpo = []
+    for i in range(n_unidades):
+        corpo.extend(_bloco_unidade(r, i))
+
+    paginas = []
+    for n, inicio in enumerate(range(0, len(corpo), LINHAS_POR_PAGINA), start=1):
+        cabecalho = [
+            "Relatório de unidades",
+            "Condomínio: 000123 - CONDOMÍNIO EDIFÍCIO EXEMPLO          CNPJ: 12.345.678/0001-90",
+            f"Emitido em 01/01/2025 08:00                             Página {n}",
+        ]
+        paginas.append("\n".join(cabecalho + corpo[inicio:inicio + LINHAS_POR_PAGINA]) + "\n\f")
+    return "".join(paginas)
+
+
+# ----------------- medição -----------------
+
+def _pico_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024, 1)
+
+
+def _medir(tamanho: Optional[int], caminho_pdf: Optional[str], config: str, modelo: str,
+           pdftotext: Optional[str]) -> dict:
+    """Roda as etapas uma vez (em processo próprio) e devolve os tempos."""
+    etapas = {}
+    extrator = ExtractorPDF(config_path=config)
+    extrator.configurar_modelo(modelo)
+
+    inicio = time.perf_counter()
+    try:
+        exe = _resolver_pdftotext(pdftotext)
+    except FileNotFoundError:
+        exe = None
+    etapas["resolver_pdftotext"] = time.perf_counter() - inicio
+
+    if caminho_pdf:
+        if not exe:
+            raise FileNotFoundError("pdftotext não encontrado: necessário para medir um PDF real.")
+        inicio = time.perf_counter()
+        texto = subprocess.run([exe, *OPCOES_PDFTOTEXT, caminho_pdf, "-"], stdout=subprocess.PIPE,
+                               check=True).stdout.decode("utf-8")
+        etapas["pdftotext"] = time.perf_counter() - inicio
+    else:
+        texto = gerar_relatorio(tamanho)
+        etapas["pdftotext"] = None  # texto sintético: não há PDF
+
+    inicio = time.perf_counter()
+    dados = extrator.extrair_dados(texto)
+    etapas["parse"] = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as pasta:
+        extrator.configurar_pasta_saida(pasta)
+        inicio = time.perf_counter()
+        extrator.salvar_excel(extrator._montar_dataframe(dados), "benchmark.xlsx")
+        etapas["salvar_excel"] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        extrator.salvar_linhas(dados, "benchmark_stream")
+        etapas["salvar_linhas"] = time.perf_counter() - inicio
+
+    total = sum(etapas[k] for k in ETAPAS_TOTAL if etapas.get(k) is not None)
+    return {
+        "entrada": caminho_pdf or f"sintetico:{tamanho}",
+        "unidades": len(dados),
+        "caracteres_texto": len(texto),
+        "etapas_s": {k: (round(v, 4) if v is not None else None) for k, v in etapas.items()},
+        "total_s": round(total, 4),
+        "unidades_por_segundo_parse": round(len(dados) / etapas["parse"], 1) if etapas["parse"] else None,
+        "unidades_por_segundo_total": round(len(dados) / total, 1) if total else None,
+        "pico_rss_mb": _pico_rss_mb(),
+    }
+
+
+def _rodar_isolado(*args) -> dict:
+    # processo novo (spawn) por medição: o pico de RSS não herda o das anteriores
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_medir, *args).result()
+
+
+def _commit_atual() -> Optional[str]:
+    git = shutil.which("git")
+    if not git:
+        return None
+    try:
+        saida = subprocess.run([git, "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return saida.stdout.decode().strip() or None
+    except OSError:
+        return None
+
+
+def comparar(atual: dict, anterior: dict):
+    """Imprime a razão de tempo (atual / anterior) por entrada e etapa."""
+    por_entrada = {r["entrada"]: r for r in anterior.get("resultados", [])}
+    print(f"Comparação com {anterior.get('commit') or '?'} ({anterior.get('data', '?')}); < 1.00 = mais rápido")
+    for r in atual["resultados"]:
+        antes = por_entrada.get(r["entrada"])
+        if not antes:
+            continue
+        partes = []
+        for etapa, t in list(r["etapas_s"].items()) + [("total", r["total_s"])]:
+            t_antes = antes["total_s"] if etapa == "total" else antes["etapas_s"].get(etapa)
+            if t and t_antes:
+                partes.append(f"{etapa}={t / t_antes:.2f}")
+        print(f"  {r['entrada']}: " + " ".join(partes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do extractor_pdf com relatórios sintéticos.")
+    parser.add_argument("--tamanhos", type=int, nargs="+",
+                        help=f"Quantidades de unidades a gerar (padrão: {' '.join(map(str, TAMANHOS_PADRAO))}, "
+                             "ou nenhuma se houver --pdf).")
+    parser.add_argument("--pdf", action="append", default=[],
+                        help="PDF real a medir (inclui a etapa pdftotext); pode repetir.")
+    parser.add_argument("--config", default=os.path.join("config", "ahreas.json"), help="Config do modelo.")
+    parser.add_argument("--modelo", default="modelo_planilha_importacao.xlsx", help="Modelo XLSX.")
+    parser.add_argument("--pdftotext", help="Caminho do executável pdftotext (opcional).")
+    parser.add_argument("--saida", help="Arquivo JSON de resultado (padrão: benchmark_<data>.json).")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar.")
+    parser.add_argument("--gerar", type=int, help="Só gera o texto sintético com N unidades em --saida.")
+    args = parser.parse_args()
+
+    if args.gerar:
+        destino = args.saida or f"relatorio_sintetico_{args.gerar}.txt"
+        with open(destino, "w", encoding="utf-8") as f:
+            f.write(gerar_relatorio(args.gerar))
+        print(f"OK: Texto sintético salvo em: {destino}")
+        return
+
+    tamanhos = args.tamanhos if args.tamanhos is not None else ([] if args.pdf else TAMANHOS_PADRAO)
+    medicoes = [(t, None) for t in tamanhos]
+    medicoes += [(None, p) for p in args.pdf]
+
+    resultados = []
+    for tamanho, pdf in medicoes:
+        r = _rodar_isolado(tamanho, pdf, args.config, args.modelo, args.pdftotext)
+        resultados.append(r)
+        etapas = " ".join(f"{k}={v:.3f}s" for k, v in r["etapas_s"].items() if v is not None)
+        print(f"{r['entrada']}: {r['unidades']} unidades, {r['unidades_por_segundo_parse']} un/s (parse), "
+              f"pico RSS {r['pico_rss_mb']} MB | {etapas}")
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    destino = args.saida or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"OK: Resultado salvo em: {destino}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Comparação de planilhas por chave, para o comparar.php.
+
+As linhas de A (ex.: saída do extractor_pdf) e B (planilha de referência)
+são pareadas por (Cód. Bloco, Cód. Unidade), e não pela posição: uma linha
+inserida em B não desalinha as seguintes. Células iguais (após trim e
+minúsculas, como no PHP) são descartadas de uma vez, coluna a coluna; só as
+diferentes passam pela métrica de similaridade, com custo limitado (ver
+similaridade) e calculadas em lotes, opcionalmente em vários processos.
+
+Uso:
+    python comparador_planilhas.py --a extraida.xlsx --b referencia.xlsx --saida diff.json
+    python comparador_planilhas.py --a A.xlsx --b B.xlsx --saida diff.json --threshold 90 --metrica levenshtein
+"""
+import argparse
+import difflib
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+COLUNAS_CHAVE = ["Cód. Bloco", "Cód. Unidade"]
+METRICAS = ("caracteres", "levenshtein")
+THRESHOLD_PADRAO = 80
+
+# Pares de valores diferentes por lote de similaridade (e por tarefa do pool)
+PARES_POR_LOTE = 2000
+
+# mesmos caracteres que o trim() do PHP
+_ESPACOS_PHP = " \t\n\r\0\x0b"
+
+
+def _normalizar(valor: str) -> str:
+    """Como normaliza_txt do comparar.php: trim + minúsculas."""
+    return valor.strip(_ESPACOS_PHP).lower()
+
+
+def _normalizar_unidade(unidade: str) -> str:
+    """Mesmo formato do extractor_pdf: unidade numérica com 4 dígitos, alfanumérica em maiúsculas."""
+    unidade = unidade.strip()
+    return unidade.zfill(4) if unidade.isdigit() else unidade.upper()
+
+
+# ----------------- métricas (em bytes, como similar_text/levenshtein do PHP) -----------------
+
+def _caracteres_comuns(a: bytes, b: bytes) -> int:
+    """php_similar_char: maior trecho comum e, recursivamente, o que sobra à esquerda e à direita."""
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    total = 0
+    pendentes = [(0, len(a), 0, len(b))]
+    while pendentes:
+        alo, ahi, blo, bhi = pendentes.pop()
+        i, j, k = matcher.find_longest_match(alo, ahi, blo, bhi)
+        if not k:
+            continue
+        total += k
+        if i > alo and j > blo:
+            pendentes.append((alo, i, blo, j))
+        if i + k < ahi and j + k < bhi:
+            pendentes.append((i + k, ahi, j + k, bhi))
+    return total
+
+
+def _similaridade_caracteres(a: bytes, b: bytes, threshold: float) -> Optional[float]:
+    # limite superior barato (bytes em comum, sem ordem): se nem ele alcança o threshold, não calcula
+    comuns_max = sum((Counter(a) & Counter(b)).values())
+    if 200.0 * comuns_max / (len(a) + len(b)) < threshold:
+        return None
+    return 200.0 * _caracteres_comuns(a, b) / (len(a) + len(b))
+
+
+def _levenshtein_limitado(a: bytes, b: bytes, limite: int) -> Optional[int]:
+    """Distância de Levenshtein se for <= limite, senão None (só a faixa |i - j| <= limite é calculada)."""
+    if abs(len(a) - len(b)) > limite:
+        return None
+    if len(a) < len(b):
+        a, b = b, a
+    infinito = limite + 1
+    anterior = [j if j <= limite else infinito for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        inicio, fim = max(1, i - limite), min(len(b), i + limite)
+        atual = [infinito] * (len(b) + 1)
+        if i <= limite:
+            atual[0] = i
+        ca = a[i - 1]
+        for j in range(inicio, fim + 1):
+            custo = anterior[j - 1] + (ca != b[j - 1])
+            if anterior[j] + 1 < custo:
+                custo = anterior[j] + 1
+            if atual[j - 1] + 1 < custo:
+                custo = atual[j - 1] + 1
+            atual[j] = custo
+        if min(atual[max(0, inicio - 1):fim + 1]) > limite:
+            return None
+        anterior = atual
+    return anterior[len(b)] if anterior[len(b)] <= limite else None
+
+
+def _similaridade_levenshtein(a: bytes, b: bytes, threshold: float) -> Optional[float]:
+    tamanho = max(len(a), len(b))
+    # sim = 100 * (1 - dist / tamanho) >= threshold  <=>  dist <= tamanho * (1 - threshold / 100)
+    limite = int(tamanho * (1 - threshold / 100.0)) + 1
+    dist = _levenshtein_limitado(a, b, limite)
+    if dist is None:
+        return None
+    return max(0.0, 100.0 * (1.0 - dist / tamanho))
+
+
+def similaridade(a: str, b: str, metrica: str = "caracteres", threshold: float = 0) -> Optional[float]:
+    """
+    Similaridade em % entre dois valores já normalizados, como no comparar.php.
+    Devolve None quando já se sabe que ela fica abaixo de `threshold` sem
+    calcular o valor exato (é o que limita o custo das strings longas).
+    """
+    if a == b:
+        return 100.0
+    if not a or not b:
+        return 0.0
+    ba, bb = a.encode("utf-8"), b.encode("utf-8")
+    if metrica == "levenshtein":
+        return _similaridade_levenshtein(ba, bb, threshold)
+    return _similaridade_caracteres(ba, bb, threshold)
+
+
+def _similaridades_lote(args: Tuple[List[Tuple[str, str]], str, float]) -> List[Optional[float]]:
+    pares, metrica, threshold = args
+    return [similaridade(a, b, metrica, threshold) for a, b in pares]
+
+
+# ----------------- comparação -----------------
+
+def carregar_planilha(caminho: str) -> pd.DataFrame:
+    """Primeira aba como texto; células vazias viram ""."""
+    return pd.read_excel(caminho, dtype=str, keep_default_na=False).fillna("")
+
+
+def _indexar(df: pd.DataFrame) -> pd.DataFrame:
+    """Chave normalizada + número da linha na planilha (cabeçalho = 1) + ocorrência para chaves repetidas."""
+    df = df.copy()
+    df["__linha"] = range(2, len(df) + 2)
+    df["__bloco"] = df[COLUNAS_CHAVE[0]].str.strip().str.upper()
+    df["__unidade"] = df[COLUNAS_CHAVE[1]].map(_normalizar_unidade)
+    df["__ocorrencia"] = df.groupby(["__bloco", "__unidade"]).cumcount()
+    return df
+
+
+def comparar_planilhas(df_a: pd.DataFrame, df_b: pd.DataFrame, threshold: float = THRESHOLD_PADRAO,
+                       metrica: str = "caracteres", workers: int = 1) -> dict:
+    """
+    Compara A e B pareando as linhas por COLUNAS_CHAVE (chaves repetidas são
+    pareadas pela ordem de ocorrência) e devolve o diff: para cada par com
+    diferença, as células cuja similaridade ficou abaixo de `threshold`,
+    além das linhas que só existem em A ou só em B.
+    """
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica desconhecida: {metrica} (use {', '.join(METRICAS)})")
+    for nome, df in (("A", df_a), ("B", df_b)):
+        faltando = [c for c in COLUNAS_CHAVE if c not in df.columns]
+        if faltando:
+            raise ValueError(f"Planilha {nome} sem as colunas de chave: {', '.join(faltando)}")
+
+    colunas = [c for c in df_a.columns if c in df_b.columns]
+    # as colunas de chave já casaram normalizadas (ex.: unidade "101" = "0101")
+    colunas_valor = [c for c in colunas if c not in COLUNAS_CHAVE]
+    juntas = pd.merge(_indexar(df_a), _indexar(df_b), on=["__bloco", "__unidade", "__ocorrencia"],
+                      how="outer", suffixes=("__a", "__b"), indicator=True, sort=False)
+
+    def _chaves(linhas: pd.DataFrame, lado: str) -> List[dict]:
+        return [{"chave": [bl, un], "linha": int(ln)}
+                for bl, un, ln in zip(linhas["__bloco"], linhas["__unidade"], linhas[f"__linha__{lado}"])]
+
+    somente_a = _chaves(juntas[juntas["_merge"] == "left_only"], "a")
+    somente_b = _chaves(juntas[juntas["_merge"] == "right_only"], "b")
+    pares = juntas[juntas["_merge"] == "both"].reset_index(drop=True)
+
+    # células diferentes, coluna a coluna: (posição do par, coluna, valor A, valor B)
+    candidatas = []
+    for col in colunas_valor:
+        va, vb = f"{col}__a", f"{col}__b"
+        na = pares[va].map(_normalizar)
+        nb = pares[vb].map(_normalizar)
+        diferentes = (na != nb).to_numpy().nonzero()[0]
+        for pos in diferentes:
+            candidatas.append((int(pos), col, na.iat[pos], nb.iat[pos]))
+
+    # cada par distinto de valores é medido uma vez, em lotes
+    unicos = list(dict.fromkeys((a, b) for _, _, a, b in candidatas))
+    lotes = [(unicos[i:i + PARES_POR_LOTE], metrica, threshold) for i in range(0, len(unicos), PARES_POR_LOTE)]
+    if workers > 1 and len(lotes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = pool.map(_similaridades_lote, lotes)
+            sims = [s for lote in resultados for s in lote]
+    else:
+        sims = [s for lote in lotes for s in _similaridades_lote(lote)]
+    sim_por_par = dict(zip(unicos, sims))
+
+    linhas: Dict[int, dict] = {}
+    celulas = 0
+    for pos, col, a, b in candidatas:
+        sim = sim_por_par[(a, b)]
+        if sim is not None and sim >= threshold:
+            continue
+        celulas += 1
+        linha = linhas.get(pos)
+        if linha is None:
+            par = pares.iloc[pos]
+            linha = linhas[pos] = {
+                "chave": [par["__bloco"], par["__unidade"]],
+                "linha_a": int(par["__linha__a"]),
+                "linha_b": int(par["__linha__b"]),
+                "diferencas": {},
+            }
+        # [valor A, valor B, similaridade (None = abaixo do threshold, não calculada)]
+        linha["diferencas"][col] = [
+            pares.at[pos, f"{col}__a"], pares.at[pos, f"{col}__b"], round(sim, 1) if sim is not None else None
+        ]
+
+    return {
+        "chave": COLUNAS_CHAVE,
+        "metrica": metrica,
+        "threshold": threshold,
+        "colunas": colunas,
+        "colunas_somente_a": [c for c in df_a.columns if c not in df_b.columns],
+        "colunas_somente_b": [c for c in df_b.columns if c not in df_a.columns],
+        "linhas": [linhas[pos] for pos in sorted(linhas)],
+        "somente_a": somente_a,
+        "somente_b": somente_b,
+        "totais": {
+            "linhas_a": len(df_a),
+            "linhas_b": len(df_b),
+            "pareadas": len(pares),
+            "linhas_com_diferenca": len(linhas),
+            "celulas_diferentes": celulas,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara duas planilhas por (Cód. Bloco, Cód. Unidade).")
+    parser.add_argument("--a", required=True, help="Planilha A (ex.: saída do extractor_pdf)")
+    parser.add_argument("--b", required=True, help="Planilha B (referência)")
+    parser.add_argument("--saida", required=True, help="Arquivo JSON com o diff")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD_PADRAO,
+                        help=f"Similaridade mínima (%%) para considerar as células iguais (padrão: {THRESHOLD_PADRAO}).")
+    parser.add_argument("--metrica", choices=METRICAS, default="caracteres",
+                        help="caracteres (similar_text, padrão) ou levenshtein (normalizado).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para calcular a similaridade dos lotes (padrão: 1).")
+    args = parser.parse_args()
+
+    try:
+        diff = comparar_planilhas(carregar_planilha(args.a), carregar_planilha(args.b),
+                                  threshold=args.threshold, metrica=args.metrica, workers=args.workers)
+        pasta = os.path.dirname(args.saida)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(diff, f, ensure_ascii=False, separators=(",", ":"))
+    except Exception as e:
+        print(f"ERRO: {str(e)}")
+        sys.exit(1)
+    t = diff["totais"]
+    print(f"OK: {t['linhas_com_diferenca']} linhas com diferença, {t['celulas_diferentes']} células, "
+          f"{len(diff['somente_a'])} só em A, {len(diff['somente_b'])} só em B. Diff em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ require_once __DIR__ . '/auth/bootstrap.php';
 auth_require_login(); // exige login
 app_log('page.view', ['page'=>basename(__FILE__)]);
 require_once __DIR__ . '/vendor/autoload.php';
+require_once __DIR__ . '/executar_python.php';
 use PhpOffice\PhpSpreadsheet\IOFactory;
 use Dompdf\Dompdf;
 
@@ -84,6 +85,63 @@ function marcarDiferencas(&$dadosA, &$dadosB, int $threshold, string $metrica) {
     }
 }
 
+/**
+ * Igual a marcarDiferencas, mas pareando as linhas por (Cód. Bloco, Cód. Unidade)
+ * via comparador_planilhas.py: uma linha inserida não desalinha as seguintes.
+ * Linhas sem par na outra planilha ficam inteiras marcadas.
+ * Retorna false se o comparador Python falhar (o chamador usa a comparação por posição).
+ */
+function marcarDiferencasPorChave(&$dadosA, &$dadosB, string $pathA, string $pathB, int $threshold, string $metrica): bool {
+    $script = __DIR__ . '/comparador_planilhas.py';
+    if (!file_exists($script)) return false;
+
+    $saida = sys_get_temp_dir() . '/' . uniqid('cmp_diff_') . '.json';
+    $cmd = escapeshellcmd(pick_python_binary()) . ' ' . implode(' ', [
+        escapeshellarg($script),
+        '--a',         escapeshellarg($pathA),
+        '--b',         escapeshellarg($pathB),
+        '--saida',     escapeshellarg($saida),
+        '--threshold', escapeshellarg((string)$threshold),
+        '--metrica',   escapeshellarg($metrica),
+    ]);
+    $env = $_ENV;
+    $env['PYTHONIOENCODING'] = 'utf-8';
+    $res = run_cmd($cmd, $env);
+    app_log('compare.run', ['cmd'=>$cmd, 'exit'=>$res['exit']]);
+
+    $diff = ($res['exit'] === 0 && file_exists($saida)) ? json_decode((string)file_get_contents($saida), true) : null;
+    @unlink($saida);
+    if (!is_array($diff)) return false;
+
+    // nome da coluna -> letra (A, B, C...) de cada planilha
+    $letrasA = array_flip(array_map('strval', $dadosA[1] ?? []));
+    $letrasB = array_flip(array_map('strval', $dadosB[1] ?? []));
+
+    foreach ($diff['linhas'] as $linha) {
+        foreach ($linha['diferencas'] as $coluna => $valores) {
+            $la = $letrasA[$coluna] ?? null;
+            $lb = $letrasB[$coluna] ?? null;
+            if ($la !== null && isset($dadosA[$linha['linha_a']][$la])) {
+                $dadosA[$linha['linha_a']][$la] = ["__DIFF__", $dadosA[$linha['linha_a']][$la]];
+            }
+            if ($lb !== null && isset($dadosB[$linha['linha_b']][$lb])) {
+                $dadosB[$linha['linha_b']][$lb] = ["__DIFF__", $dadosB[$linha['linha_b']][$lb]];
+            }
+        }
+    }
+    foreach ($diff['somente_a'] as $sem_par) {
+        $i = $sem_par['linha'];
+        if (!isset($dadosA[$i])) continue;
+        foreach ($dadosA[$i] as $col => $val) $dadosA[$i][$col] = ["__DIFF__", $val];
+    }
+    foreach ($diff['somente_b'] as $sem_par) {
+        $i = $sem_par['linha'];
+        if (!isset($dadosB[$i])) continue;
+        foreach ($dadosB[$i] as $col => $val) $dadosB[$i][$col] = ["__DIFF__", $val];
+    }
+    return true;
+}
+
 /** Tabela HTML (A ou B) com classes de diferença aplicadas */
 function htmlTabelaComDiff($dados, $titulo) {
     if (!$dados || count($dados) === 0) return "<p>Sem dados</p>";
@@ -176,7 +234,9 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
             if (implode('|', $cabA) !== implode('|', $cabB)) {
                 $erro = "As planilhas possuem colunas diferentes. Gere ambas pelo mesmo modelo antes de comparar.";
             } else {
-                marcarDiferencas($dadosA, $dadosB, $threshold, $metrica);
+                if (!marcarDiferencasPorChave($dadosA, $dadosB, $pathA, $pathB, $threshold, $metrica)) {
+                    marcarDiferencas($dadosA, $dadosB, $threshold, $metrica);
+                }
                 $htmlA = htmlTabelaComDiff($dadosA, "A");
                 $htmlB = htmlTabelaComDiff($dadosB, "B");
             }
@@ -203,7 +263,9 @@ if (($_SERVER['REQUEST_METHOD'] === 'POST') && isset($_POST['export_pdf']) && $_
         if (implode('|', $cabA) !== implode('|', $cabB)) {
             $erro = "As planilhas possuem colunas diferentes. Gere ambas pelo mesmo modelo antes de comparar.";
         } else {
-            marcarDiferencas($dadosA, $dadosB, $threshold, $metrica);
+            if (!marcarDiferencasPorChave($dadosA, $dadosB, $pathA, $pathB, $threshold, $metrica)) {
+                marcarDiferencas($dadosA, $dadosB, $threshold, $metrica);
+            }
             $htmlA = htmlTabelaComDiff($dadosA, "A");
             $htmlB = htmlTabelaComDiff($dadosB, "B");
 
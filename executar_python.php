@@ -0,0 +1,96 @@
+<?php
+/* ---------- helpers de execução ---------- */
+
+function pick_python_binary(): string {
+  // Permite forçar via env na hospedagem/local
+  $env = getenv('PYTHON_BIN');
+  if ($env) return $env;
+
+  $isWin = stripos(PHP_OS_FAMILY, 'Windows') !== false;
+
+  if ($isWin) {
+    // tenta py -3, py, depois where python3/python
+    $out = @shell_exec('py -3 -V 2>&1');
+    if ($out && stripos($out, 'Python') !== false) return 'py -3';
+    $out = @shell_exec('py -V 2>&1');
+    if ($out && stripos($out, 'Python') !== false) return 'py';
+    foreach (['python3','python'] as $bin) {
+      $w = @shell_exec('where '.$bin.' 2>&1');
+      if ($w && stripos($w, 'Could not find') === false && stripos($w, 'Não foi possível') === false) return $bin;
+    }
+    return 'py -3';
+  } else {
+    foreach (['python3','python'] as $bin) {
+      $p = @shell_exec('which '.$bin.' 2>&1');
+      if ($p && trim($p) !== '') return $bin;
+    }
+    return 'python3';
+  }
+}
+
+function run_cmd(string $cmd, array $env = []): array {
+  $spec = [
+    0 => ['pipe','r'],
+    1 => ['pipe','w'],
+    2 => ['pipe','w'],
+  ];
+  $proc = proc_open($cmd, $spec, $pipes, __DIR__, $env);
+  if (!is_resource($proc)) {
+    return ['exit'=>-1, 'stdout'=>'', 'stderr'=>'proc_open falhou'];
+  }
+  fclose($pipes[0]);
+  $stdout = stream_get_contents($pipes[1]); fclose($pipes[1]);
+  $stderr = stream_get_contents($pipes[2]); fclose($pipes[2]);
+  $exit   = proc_close($proc);
+  return ['exit'=>$exit, 'stdout'=>$stdout, 'stderr'=>$stderr];
+}
+
+function processo_ativo(int $pid): bool {
+  if ($pid <= 0) return false;
+  if (function_exists('posix_kill')) {
+    // EPERM (1): o processo existe, mas é de outro usuário
+    return posix_kill($pid, 0) || posix_get_last_error() === 1;
+  }
+  if (is_dir('/proc')) return is_dir('/proc/'.$pid);
+  if (stripos(PHP_OS_FAMILY, 'Windows') !== false) {
+    $out = @shell_exec('tasklist /FI "PID eq '.$pid.'" /NH 2>&1');
+    return $out !== null && preg_match('/\b'.$pid.'\b/', $out) === 1;
+  }
+  return true; // sem como verificar: considera ativo
+}
+
+/* ---------- jobs de extração ---------- */
+
+// estado dos jobs (pedido, status, log, cancelamento) fica fora da pasta servida
+// (output/ é baixável); o extractor_pdf.py recebe esta pasta em --pasta-jobs
+function pasta_estado_jobs(): string {
+  $pasta = getenv('EXTRACTOR_JOBS_DIR');
+  if ($pasta) return rtrim($pasta, '/\\');
+  $uid = function_exists('posix_geteuid') ? posix_geteuid() : getmyuid();
+  return rtrim(sys_get_temp_dir(), '/\\') . '/cleanalyze_jobs_' . $uid;
+}
+
+// pasta de estado do job (ids gerados pelo extractor_pdf.py --job)
+function pasta_job(string $job_id): ?string {
+  if (!preg_match('/^[0-9a-f]{32}$/', $job_id)) return null;
+  return pasta_estado_jobs() . '/' . $job_id . '/';
+}
+
+// job em fila/executando cujo processo morreu: grava "erro" no status.json
+// (senão a página consultaria o status para sempre)
+function verificar_processo_job(string $pasta, array $status): array {
+  $ativos = ['fila', 'executando'];
+  if (!in_array($status['status'] ?? '', $ativos, true)) return $status;
+  $pid = (int)($status['pid'] ?? @file_get_contents($pasta . 'job.pid'));
+  if (!$pid || processo_ativo($pid)) return $status;
+
+  // o job pode ter terminado entre a leitura do status e a verificação
+  $status = json_load($pasta . 'status.json');
+  if (!in_array($status['status'] ?? '', $ativos, true)) return $status;
+  $status['status']   = 'erro';
+  $status['mensagem'] = 'ERRO: O processo da extração terminou sem concluir.';
+  $status['fim']      = date('Y-m-d\TH:i:s');
+  json_save($pasta . 'status.json', $status);
+  app_log('extract.job_morto', ['job'=>$status['id'] ?? '', 'pid'=>$pid]);
+  return $status;
+}
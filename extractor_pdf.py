@@ -1,17 +1,132 @@
+from __future__ import annotations
+
 import subprocess
-import pandas as pd
 import re
 import os
+import io
+import contextlib
+import copy
+import csv
+import glob
+import gzip
+import hashlib
+import itertools
+import mmap
+import multiprocessing
 import unicodedata
-from typing import List, Tuple, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Tuple, Optional
 import argparse
 import sys
 import json
 import shutil
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+# pandas é importado só onde é usado: o cliente do worker residente
+# (ver servir/_enviar_ao_worker) não paga o import
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Valor padrão para vagas quando "Tipo de unidade" vier vazio
 DEFAULT_TIPO_VAGA = "VAGA"
 
+# Opções comuns a toda chamada do pdftotext: no Windows o padrão é "-eol dos"
+# (CRLF), e quem lê bytes (pool, mmap) não traduz as quebras de linha
+OPCOES_PDFTOTEXT = ['-layout', '-eol', 'unix']
+
+# Tamanho dos pedaços lidos do stdout do pdftotext no modo streaming
+TAMANHO_LEITURA_STREAM = 64 * 1024
+
+# Nome fixo (sem extensão) da saída gerada pela CLI (extrair.php procura pelo .xlsx)
+NOME_SAIDA_PADRAO = "relatorio_unidades_extraido"
+
+# Escritores de saída: linhas por grupo (row group) no Parquet
+LINHAS_POR_GRUPO_PARQUET = 10000
+
+# Modo lote: planilha consolidada, coluna com o PDF de origem e resumo JSON
+NOME_CONSOLIDADO_LOTE = "relatorio_lote_consolidado"
+COLUNA_ARQUIVO_ORIGEM = "Arquivo Origem"
+NOME_RESUMO_LOTE = "resumo_lote.json"
+
+# Divisão por condomínio: código usado quando o relatório não traz o cabeçalho
+# "Condomínio: <código> - ..." (e em todo relatório fora desse modo) e resumo JSON
+CODIGO_CONDOMINIO_PADRAO = "000000"
+NOME_RESUMO_CONDOMINIOS = "resumo_condominios.json"
+
+# Modo incremental: sufixo do delta gravado ao lado da saída (<nome>_delta.json)
+SUFIXO_DELTA = "_delta.json"
+
+# Jobs (modo assíncrono): subpasta de <saida> com a saída de cada job (<saida>/jobs/<id>/),
+# arquivos de estado de cada job (ver PASTA_ESTADO_JOBS_PADRAO) e intervalo mínimo (s)
+# entre gravações do status
+PASTA_JOBS = "jobs"
+ARQUIVO_PEDIDO_JOB = "pedido.json"
+ARQUIVO_STATUS_JOB = "status.json"
+ARQUIVO_CANCELAR_JOB = "cancelar"
+ARQUIVO_LOG_JOB = "job.log"
+ARQUIVO_PID_JOB = "job.pid"
+ARQUIVO_METRICAS_JOB = "metricas.json"
+INTERVALO_STATUS_JOB = 1.0
+STATUS_FINAIS_JOB = ("concluido", "erro", "cancelado")
+
+# Pastas em tempdir são por usuário (sufixo com o uid) e criadas com permissão 0700
+# (ver _criar_pasta_privada): outro usuário não lê o conteúdo nem as cria antes
+_SUFIXO_USUARIO = f"_{os.getuid()}" if hasattr(os, "getuid") else ""
+
+# Worker residente: socket Unix (sobrescreva com EXTRACTOR_SOCKET) e timeout de conexão.
+# O socket fica numa pasta privada: outro usuário não consegue se passar pelo worker
+SOCKET_WORKER_PADRAO = os.environ.get(
+    "EXTRACTOR_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"cleanalyze_extractor{_SUFIXO_USUARIO}", "extractor.sock")
+)
+TIMEOUT_CONEXAO_WORKER = 2.0
+
+# Cache de resultados: pasta privada (sobrescreva com EXTRACTOR_CACHE_DIR) e limites de
+# eviction. CACHE_VERSAO entra na chave: incremente quando a extração mudar de resultado.
+CACHE_DIR_PADRAO = os.environ.get(
+    "EXTRACTOR_CACHE_DIR", os.path.join(tempfile.gettempdir(), f"cleanalyze_cache{_SUFIXO_USUARIO}")
+)
+CACHE_MAX_MB = 500
+CACHE_MAX_DIAS = 30
+CACHE_VERSAO = 2
+
+# Estado dos jobs (pedido, status, log, pid, métricas e cancelamento): pasta privada fora
+# de <saida>, que pode ser servida pela web (sobrescreva com EXTRACTOR_JOBS_DIR). Jobs
+# terminados há mais de TTL_JOBS_HORAS são apagados, estado e saída, a cada job enviado.
+PASTA_ESTADO_JOBS_PADRAO = os.environ.get(
+    "EXTRACTOR_JOBS_DIR", os.path.join(tempfile.gettempdir(), f"cleanalyze_jobs{_SUFIXO_USUARIO}")
+)
+TTL_JOBS_HORAS = 24
+
+# Extração paralela: intervalos por worker (balanceamento) e páginas mínimas por intervalo
+INTERVALOS_POR_WORKER = 4
+PAGINAS_MIN_INTERVALO = 10
+
+def _pasta_privada(pasta: str) -> bool:
+    """A pasta é do usuário atual e ninguém mais tem acesso (0700)."""
+    try:
+        info = os.stat(pasta)
+    except OSError:
+        return False
+    return info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+
+def _criar_pasta_privada(pasta: str):
+    """
+    Cria `pasta` com permissão 0700 e recusa uma pasta existente de outro
+    usuário ou acessível a outros (sem uid, como no Windows, só cria).
+    """
+    os.makedirs(pasta, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid") and not _pasta_privada(pasta):
+        raise RuntimeError(f"A pasta deve ser do usuário atual e ter permissão 0700: {pasta}")
+
+
 def _resolver_pdftotext(caminho_forcado: Optional[str] = None) -> str:
     """
     Resolve o executável `pdftotext`.
@@ -60,28 +175,1220 @@ def _resolver_pdftotext(caminho_forcado: Optional[str] = None) -> str:
     )
 
 
+def _stream_pdftotext(exe: str, caminho_pdf: str) -> Iterator[str]:
+    """
+    Executa `pdftotext -layout <pdf> -` e devolve o texto em pedaços, à medida
+    que o processo escreve no stdout (sem arquivo .txt intermediário).
+    """
+    proc = subprocess.Popen([exe, *OPCOES_PDFTOTEXT, caminho_pdf, '-'], stdout=subprocess.PIPE)
+    try:
+        leitor = io.TextIOWrapper(proc.stdout, encoding='utf-8')
+        while True:
+            parte = leitor.read(TAMANHO_LEITURA_STREAM)
+            if not parte:
+                break
+            yield parte
+        retorno = proc.wait()
+        if retorno != 0:
+            raise subprocess.CalledProcessError(retorno, proc.args)
+    finally:
+        # consumidor parou no meio (erro na extração): não deixa o processo órfão
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+
+def _resolver_pdfinfo(exe_pdftotext: str) -> Optional[str]:
+    """`pdfinfo` do mesmo Poppler do pdftotext (mesma pasta) ou do PATH; None se não houver."""
+    nome = "pdfinfo.exe" if exe_pdftotext.lower().endswith(".exe") else "pdfinfo"
+    candidato = os.path.join(os.path.dirname(exe_pdftotext), nome)
+    if os.path.isfile(candidato):
+        return candidato
+    return shutil.which("pdfinfo")
+
+
+def _contar_paginas(exe_pdfinfo: str, caminho_pdf: str) -> int:
+    saida = subprocess.run([exe_pdfinfo, caminho_pdf], stdout=subprocess.PIPE, check=True).stdout
+    m = re.search(r'^Pages:\s*(\d+)', saida.decode('utf-8', errors='replace'), re.MULTILINE)
+    if not m:
+        raise RuntimeError("pdfinfo não informou o número de páginas.")
+    return int(m.group(1))
+
+
+def _dividir_paginas(total_paginas: int, workers: int) -> List[Tuple[int, int]]:
+    """Divide 1..total_paginas em intervalos contíguos (primeira, ultima) para -f/-l."""
+    n = max(1, min(workers * INTERVALOS_POR_WORKER, -(-total_paginas // PAGINAS_MIN_INTERVALO)))
+    tamanho = -(-total_paginas // n)
+    return [(p, min(p + tamanho - 1, total_paginas)) for p in range(1, total_paginas + 1, tamanho)]
+
+
+# extrator de cada processo do pool (definido pelo initializer)
+_EXTRATOR_WORKER = None
+
+def _inicializar_worker(extrator: "ExtractorPDF"):
+    global _EXTRATOR_WORKER
+    _EXTRATOR_WORKER = extrator
+
+
+def _abrir_pool(workers: int, extrator: "ExtractorPDF") -> ProcessPoolExecutor:
+    """Pool de processos com `extrator` em _EXTRATOR_WORKER de cada processo."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker, initargs=(extrator,))
+
+
+def _extrair_intervalo(args: Tuple[str, str, int, int]) -> dict:
+    exe, caminho_pdf, primeira, ultima = args
+    extrator = _EXTRATOR_WORKER
+    if extrator.metricas is not None:
+        # métricas só deste intervalo; o processo principal soma (ver extrair_dados_paralelo)
+        extrator = copy.copy(extrator)
+        extrator.configurar_metricas()
+    with _etapa(extrator.metricas, "pdftotext"):
+        saida = subprocess.run(
+            [exe, *OPCOES_PDFTOTEXT, '-f', str(primeira), '-l', str(ultima), caminho_pdf, '-'],
+            stdout=subprocess.PIPE, check=True
+        ).stdout
+    with _etapa(extrator.metricas, "parsing"):
+        parte = extrator._dividir_intervalo(saida.decode('utf-8'))
+    if extrator.metricas is not None:
+        parte["metricas"] = extrator.metricas.como_dict()
+    return parte
+
+
+def _processar_arquivo_lote(args: Tuple[str, str, Optional[str], bool]):
+    return copy.copy(_EXTRATOR_WORKER)._processar_arquivo_lote(*args)
+
+
+def _processar_condominio(args: Tuple[str, dict, str, str]):
+    return copy.copy(_EXTRATOR_WORKER)._processar_condominio(*args)
+
+
+def listar_pdfs(entrada: str) -> List[str]:
+    """PDFs de uma pasta (não recursivo) ou de um padrão glob, em ordem alfabética."""
+    if os.path.isdir(entrada):
+        caminhos = [os.path.join(entrada, n) for n in os.listdir(entrada) if n.lower().endswith(".pdf")]
+    else:
+        caminhos = [c for c in glob.glob(entrada) if os.path.isfile(c)]
+    return sorted(caminhos)
+
+
+class TextoMapeado:
+    """
+    Texto do pdftotext (UTF-8, em disco) mapeado em memória com mmap.
+
+    Os blocos de unidade são localizados por offsets de bytes direto no mapa,
+    sem carregar o texto inteiro: só o bloco corrente é decodificado, e as
+    quebras de página (\f) são puladas como separadores na decodificação,
+    em vez de copiar o texto para removê-las. O \f nunca aparece dentro de
+    um caractere multibyte em UTF-8, então os offsets são seguros.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "rb")
+        # mmap não aceita arquivo vazio
+        tamanho = os.fstat(self._arquivo.fileno()).st_size
+        self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ) if tamanho else None
+
+    def __enter__(self) -> "TextoMapeado":
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        self._arquivo.close()
+
+    def __len__(self) -> int:
+        return len(self._mapa) if self._mapa is not None else 0
+
+    def offsets_blocos(self, re_unidade_bytes: "re.Pattern[bytes]", inicio_trecho: int = 0,
+                       fim_trecho: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """
+        (início, fim) em bytes de cada bloco: de um cabeçalho até o seguinte (ou
+        o fim do texto), só dentro do trecho [inicio_trecho, fim_trecho).
+        """
+        if self._mapa is None:
+            return
+        if fim_trecho is None:
+            fim_trecho = len(self._mapa)
+        inicio = None
+        for m in re_unidade_bytes.finditer(self._mapa, inicio_trecho, fim_trecho):
+            if inicio is not None:
+                yield inicio, m.start()
+            inicio = m.start()
+        if inicio is not None:
+            yield inicio, fim_trecho
+
+    def condominios(self, re_condominio_bytes: "re.Pattern[bytes]") -> List[dict]:
+        """
+        Condomínios do relatório, numa passada pelos cabeçalhos de página
+        (grupos: código, nome, CNPJ): código, nome, CNPJ e os trechos
+        [início, fim) em bytes de cada um, em ordem de aparição. O corte é no
+        início da página em que o condomínio muda; um condomínio que volta
+        depois ganha mais um trecho. Sem cabeçalho, um só condomínio
+        (CODIGO_CONDOMINIO_PADRAO) com o texto inteiro.
+        """
+        condominios = {}
+        atual, inicio = None, 0
+        for m in (re_condominio_bytes.finditer(self._mapa) if self._mapa is not None else ()):
+            codigo = (m.group(1) or b"").decode("utf-8")
+            cnpj = m.group(3).decode("utf-8")
+            chave = codigo or cnpj
+            if chave == atual:
+                continue
+            if atual is not None:
+                # início da página do novo cabeçalho (o texto antes do primeiro fica com ele)
+                corte = self._mapa.rfind(b"\f", 0, m.start()) + 1
+                if corte > inicio:
+                    condominios[atual]["trechos"].append((inicio, corte))
+                    inicio = corte
+            if chave not in condominios:
+                condominios[chave] = {
+                    "codigo": codigo or CODIGO_CONDOMINIO_PADRAO,
+                    "nome": m.group(2).decode("utf-8", errors="replace").strip(),
+                    "cnpj": cnpj,
+                    "sufixo": re.sub(r"\D", "", chave),
+                    "trechos": [],
+                }
+            atual = chave
+        if atual is None:
+            return [{"codigo": CODIGO_CONDOMINIO_PADRAO, "nome": "", "cnpj": "",
+                     "sufixo": CODIGO_CONDOMINIO_PADRAO, "trechos": [(0, len(self))]}]
+        condominios[atual]["trechos"].append((inicio, len(self)))
+        return list(condominios.values())
+
+    def texto(self, inicio: int, fim: int) -> str:
+        """Trecho [inicio, fim) decodificado, sem as quebras de página."""
+        mapa = self._mapa
+        with memoryview(mapa) as visao:
+            quebra = mapa.find(b"\f", inicio, fim)
+            if quebra < 0:
+                return str(visao[inicio:fim], "utf-8")
+            trechos = []
+            while quebra >= 0:
+                trechos.append(visao[inicio:quebra])
+                inicio = quebra + 1
+                quebra = mapa.find(b"\f", inicio, fim)
+            trechos.append(visao[inicio:fim])
+            texto = b"".join(trechos).decode("utf-8")
+            # as fatias seguram o buffer do mmap: solta antes do memoryview fechar
+            trechos.clear()
+            return texto
+
+
+# Em bytes UTF-8, todo caractere que o \s de str aceita (ASCII, \x1c-\x1f, NEL, NBSP
+# e os espaços Unicode), para os regex de bytes casarem o mesmo que os de str
+_ESPACO_BYTES = (rb'(?:[\s\x1c-\x1f]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]'
+                 rb'|\xe2\x81\x9f|\xe3\x80\x80)')
+
+
+class ScannerBloco:
+    """
+    Varredura compilada de um bloco de unidade.
+
+    As expressões são compiladas uma única vez por ExtractorPDF e os campos
+    rotulados ("Rótulo: valor") são preenchidos numa única passada pelo bloco,
+    despachando pelo rótulo encontrado. O resultado é idêntico ao das funções
+    extrair_* do ExtractorPDF, que continuam sendo a implementação de referência.
+    """
+
+    # (tipo, rótulo, valor, resto): o valor é capturado em lookahead e o scanner
+    # consome só o rótulo, então rótulos dentro do valor de outro continuam visíveis
+    _ROTULOS = (
+        ('fu', r'Fração unidade:\s*', r'[\d,.]+', r''),
+        ('mt', r'Metragem total:\s*', r'[\d,.]+', r''),
+        ('ac', r'Área construída:\s*', r'[\d,.]+', r''),
+        ('fg', r'Fração garagem:\s*', r'[\d,.]+', r''),
+        ('fx', r'Fração extra (?P<n_fx>10|[1-9]):\s*', r'[\d,.]+', r''),
+        ('end', r'Endereço:\s*', r'[^\n\r\f]+', r''),
+        ('tres', r'Telefone residencial\s*-\s*', r'[\d\s().-]+', r''),
+        ('tcom', r'Telefone comercial\s*-\s*', r'[\d\s().-]+', r''),
+        ('tcor', r'Tipo de correspondência\s*:\s*', r'.*?', r'\s*(?:\n|$)'),
+        ('cla', r'Classificação\s*:\s*', r'.*?', r'\s*(?:\n|$)'),
+        ('tun', r'Tipo de unidade\s*:\s*', r'', r''),
+    )
+
+    # (campo, chave em `ultimos`) das frações e metragens
+    _ROTULOS_FRACAO = (
+        ("Fração Unidade", 'fu'), ("Metragem", 'mt'), ("Área Construída", 'ac'), ("Fração Garagem", 'fg'),
+    ) + tuple((f"Fração Extra {j}", ('fx', str(j))) for j in range(1, 10 + 1))
+
+    def __init__(self, extrator: "ExtractorPDF"):
+        self.extrator = extrator
+
+        # aceita unidade alfa-numérica (ex.: VG0196), e não apenas dígitos
+        self.re_unidade = re.compile(
+            r'(Bloco:\s*\w+\s+Unidade:\s*\S+\s*[-–].+?Código do cliente:\s*\d+)',
+            re.DOTALL | re.IGNORECASE
+        )
+        # o mesmo cabeçalho em bytes UTF-8, para TextoMapeado: \w inclui os bytes
+        # de caracteres acentuados e "ó"/"Ó" e "–" são escritos em bytes. O \s de
+        # bytes só conhece espaços ASCII; _ESPACO_BYTES cobre também os do \s de
+        # str (NBSP etc.), que não podem entrar no nome do bloco nem na unidade
+        e, nao_e = _ESPACO_BYTES, rb'(?!' + _ESPACO_BYTES + rb')'
+        self.re_unidade_bytes = re.compile(
+            rb'Bloco:' + e + rb'*(?:' + nao_e + rb'[\w\x80-\xff])+' + e + rb'+Unidade:' + e
+            + rb'*(?:' + nao_e + rb'\S)+' + e + rb'*(?:-|\xe2\x80\x93).+?'
+            rb'C(?:\xc3\xb3|\xc3\x93)digo do cliente:' + e + rb'*\d+',
+            re.DOTALL | re.IGNORECASE
+        )
+        # cabeçalho de página "Condomínio: <código> - <nome>   CNPJ: <cnpj>", em bytes (ver TextoMapeado.condominios)
+        self.re_condominio_bytes = re.compile(
+            rb'Condom(?:i|\xc3\xad|\xc3\x8d)nio\s*:[ \t]*(?:(\d+)[ \t]*-[ \t]*)?([^\n]*?)[ \t]+CNPJ\s*:\s*([\d./-]+)',
+            re.IGNORECASE
+        )
+        self.re_cabecalho = re.compile(
+            r'Bloco:\s*(\w+)\s+Unidade:\s*(\S+)\s*[-–]\s*(.+?)\s+Código do cliente:\s*(\d+)',
+            re.DOTALL | re.IGNORECASE
+        )
+        self.re_rotulos = re.compile(
+            '|'.join(f'{rotulo}(?=(?P<{k}>{valor}){resto})' for k, rotulo, valor, resto in self._ROTULOS),
+            re.IGNORECASE
+        )
+        self.re_tipo_unidade = re.compile(r'(.*?)(?=Dias de prazo\s*:|$)', re.DOTALL | re.IGNORECASE)
+        self.re_espacos = re.compile(r'\s+')
+
+        # e-mails / celulares
+        self.re_email = re.compile(r'\b[\w\.-]+@[\w\.-]+\.\w+\b', re.IGNORECASE)
+        self.re_celular = re.compile(
+            r'[\(]?\d{2}[\)]?\s*9\s*\d{4}[-\s]?\d{4}|\b9\d{4}[-]?\d{4}\b|\b\d{11}\b|\b\d{2}\s*9\d{4}[-]?\d{4}'
+        )
+        self.re_nao_digito = re.compile(r'\D')
+
+        # A/C
+        self.re_ac = re.compile(
+            r'A/C\s*:\s*([^:\n]+?)(?=\s*(?:Tipo\s+de|Forma\s+de\s+envio|Locatário|Unidade\s+alugada|Endereço|Telefone|E-mail|CPF|CNPJ|Classificação|Fração|\s{2,}|\n\s*\w+\s*:|\n\n|$))',
+            re.DOTALL | re.IGNORECASE
+        )
+        self.re_ac_final = re.compile(r'[:\-\s]+$')
+        self.re_nao_palavra = re.compile(r'[^\w]')
+
+        # CPF/CNPJ
+        self.re_cnpj_condominio = re.compile(r'Condom[ií]nio\s*:.*?CNPJ\s*:\s*([\d./-]+)', re.IGNORECASE | re.DOTALL)
+        self.re_cabecalho_pagina = re.compile(
+            r'^(?:\s*Relat[óo]rio.*|'
+            r'\s*Condom[ií]nio\s*:.*|'
+            r'\s*Emitido\s+em.*|'
+            r'\s*P[áa]gina\s+\d+.*)$',
+            re.IGNORECASE | re.MULTILINE
+        )
+        self.re_tipo_pessoa = re.compile(
+            r'Tipo\s+de\s+pessoa\s*:\s*(?:F[ií]sica|Jur[ií]dica).*?(?:CPF|CNPJ)\s*:\s*([\d./-]+)',
+            re.IGNORECASE | re.DOTALL
+        )
+        self.re_cpf_cnpj = re.compile(r'(?:CPF|CNPJ)\s*:\s*([\d./-]+)', re.IGNORECASE)
+        limites = r'(?:Telefone/e-mail do cliente|Dados gerais|Dados do pagador|Observações|Rateio/frações|Endereço de cobrança)'
+        self.re_dados_pessoais = re.compile(r'Dados pessoais(.*?){lim}'.format(lim=limites), re.IGNORECASE | re.DOTALL)
+        self.re_dados_pagador = re.compile(r'(?:Dados do pagador|Dados gerais)(.*?){lim}'.format(lim=limites), re.IGNORECASE | re.DOTALL)
+
+    # ----------------- campos sem rótulo -----------------
+
+    def emails(self, bloco: str) -> List[str]:
+        # o padrão não atravessa quebras de linha: varrer o bloco inteiro
+        # equivale a varrer linha a linha como em extrair_emails
+        vistos = []
+        for m in self.re_email.finditer(bloco):
+            e = m.group().lower().strip()
+            if e not in vistos:
+                vistos.append(e)
+        return vistos
+
+    def celulares(self, bloco: str) -> List[str]:
+        celulares = []
+        for numero in self.re_celular.findall(bloco):
+            digitos = self.re_nao_digito.sub('', numero)
+            if len(digitos) == 11:
+                celulares.append(digitos)
+            elif len(digitos) == 9:
+                celulares.append("11" + digitos)
+            elif len(digitos) == 10 and digitos[2] == "9":
+                celulares.append(digitos)
+        return list(set(celulares))
+
+    def aos_cuidados(self, bloco: str) -> str:
+        posicao_ac = bloco.find("A/C:")
+        if posicao_ac == -1:
+            return ""
+        posicao_unidade_alugada = bloco.find("Unidade alugada")
+        if posicao_unidade_alugada != -1 and posicao_ac > posicao_unidade_alugada:
+            return ""
+        texto_filtrado = bloco if posicao_unidade_alugada == -1 else bloco[:posicao_unidade_alugada]
+        ac_match = self.re_ac.search(texto_filtrado)
+        if not ac_match:
+            return ""
+        valor = self.re_espacos.sub(' ', ac_match.group(1)).strip()
+        valor = self.re_ac_final.sub('', valor)
+        if not valor or valor.isdigit() or any(c in valor for c in ['Page', 'Página', '\f', '\x0c']):
+            return ""
+        palavras = []
+        for p in valor.split():
+            pl = self.re_nao_palavra.sub('', p)
+            if pl and not pl.isdigit() and len(pl) > 1 and pl.lower() not in ['tipo','de','da','do','para','com','por','em']:
+                palavras.append(p)
+        if len(palavras) < 2:
+            return ""
+        return f"{palavras[0]} {palavras[1]}"
+
+    def cpf_cnpj(self, bloco: str) -> str:
+        m_header = self.re_cnpj_condominio.search(bloco)
+        header_cnpj = m_header.group(1).strip() if m_header else None
+
+        def limpar_e_pegar(chunk: str) -> Optional[str]:
+            if not chunk:
+                return None
+            chunk = self.re_cabecalho_pagina.sub('', chunk)
+            m = self.re_tipo_pessoa.search(chunk) or self.re_cpf_cnpj.search(chunk)
+            if not m:
+                return None
+            cand = m.group(1).strip()
+            if header_cnpj and cand == header_cnpj:
+                return None
+            return cand
+
+        m_dp = self.re_dados_pessoais.search(bloco)
+        m_dg = self.re_dados_pagador.search(bloco)
+        val_dp = limpar_e_pegar(m_dp.group(1) if m_dp else '')
+        val_dg = limpar_e_pegar(m_dg.group(1) if m_dg else '')
+
+        if val_dg and (not val_dp or val_dp != val_dg):
+            return val_dg
+        if val_dp:
+            return val_dp
+        return limpar_e_pegar(bloco) or ""
+
+    # ----------------- passada única -----------------
+
+    def escanear(self, bloco: str, metricas: Optional[MetricasExtracao] = None) -> Optional[Tuple[str, dict]]:
+        """Retorna (chave_unidade, campos) do bloco, ou None se não houver cabeçalho."""
+        ext = self.extrator
+        cabecalho = self.re_cabecalho.search(bloco)
+        if not cabecalho:
+            return None
+
+        bloco_id, unidade_raw, nome, cod_cliente = cabecalho.groups()
+        unidade_raw = unidade_raw.strip()
+        unidade_fmt = unidade_raw.zfill(4) if unidade_raw.isdigit() else unidade_raw.upper()
+
+        # só os campos que chegam a alguma coluna do modelo (ver PlanoExtracao)
+        plano = ext.plano
+        precisa = plano.campos
+
+        # último valor de cada rótulo (findall[-1]), listas de telefones e
+        # primeiro valor dos campos simples (re.search)
+        ultimos = {}
+        telefones = {'tres': set(), 'tcom': set()}
+        primeiros = {}
+        # fim do último casamento aceito por tipo: emula o findall de cada
+        # padrão isolado, que não sobrepõe casamentos do mesmo rótulo
+        fim = {}
+        for m in (self.re_rotulos.finditer(bloco) if plano.rotulos else ()):
+            k = m.lastgroup
+            if k == 'fx':
+                k_fim = ('fx', m.group('n_fx'))
+            else:
+                k_fim = k
+            if m.start() < fim.get(k_fim, 0):
+                continue
+            if k in ('tcor', 'cla', 'tun'):
+                if k not in primeiros:
+                    primeiros[k] = m.end() if k == 'tun' else m.group(k)
+                continue
+            fim[k_fim] = m.end(k)
+            if k in telefones:
+                telefones[k].add(m.group(k))
+            else:
+                ultimos[k_fim] = m.group(k)
+
+        campos = {
+            "Cód. Condomínio": ext.codigo_condominio,
+            "Cód. Bloco": bloco_id,
+            "Cód. Unidade": unidade_fmt,
+            "Código do Cliente": cod_cliente,
+        }
+        if "Nome" in precisa:
+            campos["Nome"] = ext.limpar_texto(nome)
+
+        if "CPF/CNPJ" in precisa:
+            campos["CPF/CNPJ"] = _medir(metricas, "cpf_cnpj", self.cpf_cnpj, bloco)
+        if "E-mails" in precisa:
+            campos["E-mails"] = ", ".join(sorted(set(_medir(metricas, "emails", self.emails, bloco))))
+        if "Telefones Celular" in precisa:
+            campos["Telefones Celular"] = ", ".join(sorted(set(_medir(metricas, "celulares", self.celulares, bloco))))
+        campos["Telefones Residencial"] = ", ".join(sorted(telefones['tres']))
+        campos["Telefones Comercial"] = ", ".join(sorted(telefones['tcom']))
+
+        if "Cód. Tipo Unidade" in precisa:
+            tipo_unidade = ""
+            if 'tun' in primeiros:
+                valor = self.re_espacos.sub(' ', self.re_tipo_unidade.match(bloco, primeiros['tun']).group(1)).strip()
+                if valor not in (':', '-'):
+                    tipo_unidade = valor
+            if not tipo_unidade and unidade_fmt.upper().startswith("VG"):
+                tipo_unidade = DEFAULT_TIPO_VAGA
+            campos["Cód. Tipo Unidade"] = tipo_unidade
+
+        tcor = primeiros.get('tcor', '').strip()
+        if tcor in (':', '-'):
+            tcor = ""
+        partes = tcor.split()
+        campos["Tipo Corresp. Cobrança"] = partes[0] if partes else ""
+
+        cla = primeiros.get('cla', '').strip()
+        if cla in (':', '-'):
+            cla = ""
+        if "-" in cla:
+            cla = cla.split("-")[0].strip()
+        campos["Cód. Classificação Unidade"] = cla
+
+        if "Aos Cuidados" in precisa:
+            campos["Aos Cuidados"] = _medir(metricas, "aos_cuidados", self.aos_cuidados, bloco)
+
+        if plano.endereco and 'end' in ultimos:
+            tipo_log, nome_rua, numero, bairro, cidade, estado, cep, compl = _medir(
+                metricas, "endereco", ext.extrair_campos_endereco, ultimos['end'].strip()
+            )
+            campos["Logradouro Cobrança"] = tipo_log
+            campos["Endereço Cobrança"] = nome_rua
+            campos["Número Cobrança"] = numero
+            campos["Bairro Cobrança"] = bairro
+            campos["Cidade Cobrança"] = cidade
+            campos["Estado Cobrança"] = estado
+            campos["CEP Cobrança"] = cep
+            campos["Complemento Cobrança"] = compl
+
+        converter = ext.converter_ponto_para_virgula
+        for campo_nome, k in self._ROTULOS_FRACAO:
+            if campo_nome in precisa:
+                campos[campo_nome] = converter(ultimos.get(k, ''))
+
+        return f"{bloco_id}_{unidade_fmt}", campos
+
+
+# ----------------- escritores de saída -----------------
+# escrever() linha a linha, fechar() conclui o arquivo; descartar() é chamado
+# no lugar de fechar() quando a gravação falha e apaga o arquivo incompleto
+
+def _remover_incompleto(caminho: str):
+    with contextlib.suppress(OSError):
+        os.remove(caminho)
+
+
+class EscritorXLSX:
+    """XLSX em modo write-only do openpyxl: memória constante, linha a linha."""
+
+    extensao = ".xlsx"
+
+    def __init__(self, caminho: str, colunas: List[str]):
+        from openpyxl import Workbook
+        self.caminho = caminho
+        self._wb = Workbook(write_only=True)
+        # mesmo nome de aba do df.to_excel
+        self._ws = self._wb.create_sheet(title="Sheet1")
+        self._ws.append(colunas)
+
+    def escrever(self, linha: list):
+        # "" vira célula vazia, como no df.to_excel
+        self._ws.append([v if v != "" else None for v in linha])
+
+    def fechar(self):
+        self._wb.save(self.caminho)
+
+    def descartar(self):
+        # encerra a aba (arquivo temporário do openpyxl); já encerrada se a falha foi no save
+        with contextlib.suppress(Exception):
+            self._ws.close()
+        _remover_incompleto(self.caminho)
+
+
+class EscritorCSV:
+    extensao = ".csv"
+
+    def __init__(self, caminho: str, colunas: List[str]):
+        self.caminho = caminho
+        self._f = open(caminho, "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._f)
+        self._csv.writerow(colunas)
+
+    def escrever(self, linha: list):
+        self._csv.writerow(linha)
+
+    def fechar(self):
+        self._f.close()
+
+    def descartar(self):
+        self._f.close()
+        _remover_incompleto(self.caminho)
+
+
+class EscritorParquet:
+    """Parquet (requer pyarrow), todas as colunas como texto, gravado em grupos de linhas."""
+
+    extensao = ".parquet"
+
+    def __init__(self, caminho: str, colunas: List[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Saída Parquet requer o pacote pyarrow (pip install pyarrow).")
+        self.caminho = caminho
+        self._pa = pa
+        self._colunas = colunas
+        self._schema = pa.schema([(c, pa.string()) for c in colunas])
+        self._writer = pq.ParquetWriter(caminho, self._schema)
+        self._grupo = []
+
+    def escrever(self, linha: list):
+        self._grupo.append(linha)
+        if len(self._grupo) >= LINHAS_POR_GRUPO_PARQUET:
+            self._descarregar()
+
+    def _descarregar(self):
+        if self._grupo:
+            colunas = [list(c) for c in zip(*self._grupo)]
+            self._writer.write_table(self._pa.Table.from_arrays(colunas, schema=self._schema))
+            self._grupo = []
+
+    def fechar(self):
+        self._descarregar()
+        self._writer.close()
+
+    def descartar(self):
+        with contextlib.suppress(Exception):
+            self._writer.close()
+        _remover_incompleto(self.caminho)
+
+
+ESCRITORES = {"xlsx": EscritorXLSX, "csv": EscritorCSV, "parquet": EscritorParquet}
+
+
+def abrir_escritor(formato: str, caminho_sem_extensao: str, colunas: List[str]):
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de saída desconhecido: {formato} (use {', '.join(ESCRITORES)})")
+    classe = ESCRITORES[formato]
+    return classe(caminho_sem_extensao + classe.extensao, colunas)
+
+
+# Endereço: número (primeiro inteiro isolado após o tipo de logradouro) e CEP
+RE_NUMERO_ENDERECO = re.compile(r'\b(\d+)\b')
+RE_CEP = re.compile(r'\d{5}-\d{3}')
+
+
+class MatcherLogradouro:
+    r"""
+    Tipos de logradouro da config compilados uma vez numa única alternação.
+    Cada alternativa tem o seu próprio `\s*`, então o regex esgota um tipo
+    antes de tentar o seguinte: vence o primeiro tipo da lista que casa, como
+    no laço original de um padrão `^\s*{tipo}\b\s*(.*)` por tipo. Os tipos
+    continuam sendo interpretados como regex, como antes.
+    """
+
+    def __init__(self, tipos: List[str]):
+        self.tipos = list(tipos)
+        self._re_tipos = None
+        if self.tipos:
+            alternativas = '|'.join(rf'\s*(?P<t{i}>{tipo})\b' for i, tipo in enumerate(self.tipos))
+            self._re_tipos = re.compile(rf'(?:{alternativas})', re.IGNORECASE)
+        self._re_resto = re.compile(r'\s*(.*)')
+
+    def separar(self, logradouro: str) -> Tuple[str, str]:
+        """(tipo da config, resto do logradouro sem o tipo); ('', logradouro) se nenhum casar."""
+        m = self._re_tipos.match(logradouro) if self._re_tipos else None
+        if not m:
+            return '', logradouro
+        # o grupo do tipo é o último a fechar na alternativa que casou
+        tipo = self.tipos[int(m.lastgroup[1:])]
+        return tipo, self._re_resto.match(logradouro, m.end()).group(1).strip()
+
+
+class PlanoExtracao:
+    """
+    O que o scanner precisa calcular para um modelo, compilado uma vez a partir
+    do `mapeamento` da config e das colunas do modelo: cada coluna vira um par
+    (coluna, campo de origem) e só os campos de origem que chegam a alguma
+    coluna são extraídos. Colunas mapeadas para "" (ex.: Corresp. e Locatário
+    no ahreas) não custam nada; um modelo novo só precisa do JSON.
+    Use plano_extracao() para reaproveitar o plano entre extratores.
+    """
+
+    CAMPOS_ENDERECO = (
+        "Logradouro Cobrança", "Endereço Cobrança", "Número Cobrança", "Bairro Cobrança",
+        "Cidade Cobrança", "Estado Cobrança", "CEP Cobrança", "Complemento Cobrança",
+    )
+    # campos preenchidos a partir dos rótulos "Rótulo: valor" (ScannerBloco.re_rotulos)
+    CAMPOS_ROTULADOS = CAMPOS_ENDERECO + (
+        "Telefones Residencial", "Telefones Comercial", "Cód. Tipo Unidade", "Tipo Corresp. Cobrança",
+        "Cód. Classificação Unidade", "Fração Unidade", "Metragem", "Área Construída", "Fração Garagem",
+    ) + tuple(f"Fração Extra {j}" for j in range(1, 10 + 1))
+    # campos que a extração só preenche quando o modelo tem uma coluna com o mesmo nome
+    # (ver _campos_bloco_referencia): mapeados para outra coluna, ficam vazios
+    CAMPOS_SO_COM_COLUNA = ("Código do Cliente", "Fração Garagem") + tuple(f"Fração Extra {j}" for j in range(1, 10 + 1))
+
+    def __init__(self, mapeamento: dict, colunas: List[str]):
+        # origem "" = coluna sempre vazia
+        self.saidas: List[Tuple[str, str]] = []
+        for col in colunas:
+            origem = mapeamento.get(col, col)
+            if origem in self.CAMPOS_SO_COM_COLUNA and origem not in colunas:
+                origem = ""
+            self.saidas.append((col, origem))
+        self.campos = frozenset(origem for _, origem in self.saidas if origem)
+        self.endereco = self.precisa(*self.CAMPOS_ENDERECO)
+        self.rotulos = self.precisa(*self.CAMPOS_ROTULADOS)
+
+    def precisa(self, *campos: str) -> bool:
+        """Algum dos campos de origem chega a uma coluna do modelo?"""
+        return not self.campos.isdisjoint(campos)
+
+
+# planos já compilados, por (mapeamento, colunas do modelo)
+_PLANOS: dict = {}
+
+
+def plano_extracao(mapeamento: dict, colunas: List[str]) -> PlanoExtracao:
+    """PlanoExtracao do mapeamento e das colunas, compilado só na primeira vez."""
+    chave = (tuple(sorted(mapeamento.items())), tuple(colunas))
+    plano = _PLANOS.get(chave)
+    if plano is None:
+        plano = _PLANOS[chave] = PlanoExtracao(mapeamento, colunas)
+    return plano
+
+
+class TabelaUnidades:
+    """
+    Unidades extraídas guardadas por coluna, na ordem do modelo: uma lista de
+    valores por coluna e chave_unidade -> número da linha. Acumular um bloco
+    só preenche as células ainda vazias (a regra de merge_dados), sem um dict
+    por unidade, e escritores e DataFrame recebem as colunas já na ordem do
+    modelo, sem reindexação. Células vazias são "".
+    """
+
+    def __init__(self, colunas: List[str]):
+        self.colunas = list(colunas)
+        self.indice: dict = {}
+        self._valores: List[list] = [[] for _ in self.colunas]
+
+    @classmethod
+    def de_linhas(cls, colunas: List[str], chaves: Iterable[str], linhas: Iterable[list]) -> "TabelaUnidades":
+        """Tabela com as linhas já mescladas (ex.: do cache); None vira ""."""
+        tabela = cls(colunas)
+        for chave, linha in zip(chaves, linhas):
+            tabela.acumular(chave, ["" if v is None else v for v in linha])
+        return tabela
+
+    def __len__(self) -> int:
+        return len(self.indice)
+
+    def acumular(self, chave: str, linha: list):
+        """Soma a linha de um bloco (valores na ordem das colunas) à unidade `chave`."""
+        i = self.indice.get(chave)
+        if i is None:
+            self.indice[chave] = len(self.indice)
+            for valores, valor in zip(self._valores, linha):
+                valores.append(valor)
+            return
+        for valores, valor in zip(self._valores, linha):
+            if valor and not valores[i]:
+                valores[i] = valor
+
+    def linhas(self) -> Iterator[tuple]:
+        """Linhas na ordem em que as unidades apareceram, com os valores na ordem das colunas."""
+        return zip(*self._valores)
+
+    def itens(self) -> Iterator[Tuple[str, tuple]]:
+        """(chave_unidade, linha) de cada unidade."""
+        return zip(self.indice, self.linhas())
+
+    def por_coluna(self) -> Iterator[Tuple[str, list]]:
+        """(nome da coluna, valores de todas as unidades)."""
+        return zip(self.colunas, self._valores)
+
+    def como_dicts(self) -> List[dict]:
+        return [dict(zip(self.colunas, linha)) for linha in self.linhas()]
+
+    def dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+        return pd.DataFrame(dict(zip(self.colunas, self._valores)), columns=self.colunas)
+
+
+class CacheResultados:
+    """
+    Cache em disco das linhas extraídas, endereçado pelo conteúdo: a chave é o
+    hash dos bytes do PDF, da config e das colunas do modelo. Cada entrada é um
+    JSON gzip com as colunas e as linhas como listas. Entradas mais velhas que
+    max_dias são removidas e, acima de max_mb, as menos usadas saem primeiro.
+    As linhas têm dados pessoais: a pasta é privada (0700, do usuário atual) e
+    as entradas são gravadas com permissão 0600.
+    """
+
+    EXTENSAO = ".json.gz"
+
+    def __init__(self, pasta: str = CACHE_DIR_PADRAO, max_mb: float = CACHE_MAX_MB, max_dias: float = CACHE_MAX_DIAS):
+        _criar_pasta_privada(pasta)
+        self.pasta = pasta
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_idade = max_dias * 24 * 3600
+
+    def chave(self, caminho_pdf: str, config: dict, colunas: List[str]) -> str:
+        h = hashlib.sha256()
+        with open(caminho_pdf, "rb") as f:
+            for parte in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(parte)
+        extras = json.dumps([CACHE_VERSAO, config, colunas], sort_keys=True, ensure_ascii=False)
+        h.update(extras.encode("utf-8"))
+        return h.hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.pasta, chave + self.EXTENSAO)
+
+    def obter(self, chave: str) -> Optional[TabelaUnidades]:
+        caminho = self._caminho(chave)
+        try:
+            with gzip.open(caminho, "rt", encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - os.path.getmtime(caminho) > self.max_idade:
+            self._remover(caminho)
+            return None
+        os.utime(caminho)  # mtime = último uso (ordem da eviction por tamanho)
+        return TabelaUnidades.de_linhas(entrada["colunas"], entrada["chaves"], entrada["linhas"])
+
+    def gravar(self, chave: str, dados: TabelaUnidades):
+        entrada = {"colunas": dados.colunas, "chaves": list(dados.indice), "linhas": list(dados.linhas())}
+        temporario = self._caminho(chave) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        descritor = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o600)
+        try:
+            with os.fdopen(descritor, "wb") as bruto, gzip.open(bruto, "wt", encoding="utf-8") as f:
+                json.dump(entrada, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temporario, self._caminho(chave))
+        except BaseException:
+            self._remover(temporario)
+            raise
+        self.evictar()
+
+    def evictar(self):
+        agora = time.time()
+        entradas = []
+        for nome in os.listdir(self.pasta):
+            if not nome.endswith(self.EXTENSAO):
+                continue
+            caminho = os.path.join(self.pasta, nome)
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            if agora - st.st_mtime > self.max_idade:
+                self._remover(caminho)
+            else:
+                entradas.append((st.st_mtime, st.st_size, caminho))
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            self._remover(caminho)
+            total -= tamanho
+
+    def limpar(self):
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(self.EXTENSAO) or nome.endswith(".tmp"):
+                self._remover(os.path.join(self.pasta, nome))
+
+    @staticmethod
+    def _remover(caminho: str):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass  # outro processo já removeu
+
+
+class IndiceIncremental:
+    """
+    Índice da extração anterior de um relatório: hash do texto de cada bloco
+    -> (chave_unidade, linha já mapeada) e a linha final de cada unidade.
+    Blocos com o mesmo hash não são analisados de novo, e ao fim da extração
+    o delta (unidades adicionadas, removidas e campos alterados) é calculado
+    contra as linhas anteriores. O arquivo é um JSON gzip; config, colunas do
+    modelo e CACHE_VERSAO formam a assinatura, e um índice de assinatura
+    diferente (ou ilegível) é descartado.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.anterior = False
+        self._blocos = {}
+        self._linhas = {}
+        self._novos = {}
+        self.reaproveitados = 0
+        self.reprocessados = 0
+        self.delta: Optional[dict] = None
+
+    # linhas de cabeçalho de página que mudam a cada emissão do relatório
+    re_linha_emissao = re.compile(r'^[ \t]*(?:Emitido\s+em|P[áa]gina\s+\d+).*(?:\n|$)',
+                                  re.IGNORECASE | re.MULTILINE)
+
+    @staticmethod
+    def hash_bloco(bloco: str) -> str:
+        """
+        Hash do texto do bloco sem as linhas "Emitido em" / "Página N", para que
+        o mesmo bloco reemitido seja reaproveitado. O resto do texto entra como
+        está: os regex dos campos dependem até dos espaços.
+        """
+        texto = IndiceIncremental.re_linha_emissao.sub("", bloco)
+        return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def assinatura(config: dict, colunas: List[str]) -> str:
+        extras = json.dumps([CACHE_VERSAO, config, colunas], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(extras.encode("utf-8")).hexdigest()
+
+    def carregar(self, assinatura: str):
+        """Lê o índice anterior (se existir e for da mesma assinatura) e zera o da execução atual."""
+        self._blocos, self._linhas, self._novos = {}, {}, {}
+        self.reaproveitados = self.reprocessados = 0
+        self.anterior = False
+        self.delta = None
+        try:
+            with gzip.open(self.caminho, "rt", encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return
+        if entrada.get("assinatura") != assinatura:
+            return
+        self.anterior = True
+        # as linhas não são alteradas por TabelaUnidades.acumular: dá para reaproveitar sem cópia
+        self._blocos = {h: (chave, valores) for h, (chave, valores) in entrada["blocos"].items()}
+        self._linhas = {chave: valores for chave, valores in entrada["linhas"].items()}
+
+    def obter(self, hash_bloco: str) -> Optional[Tuple[str, list]]:
+        resultado = self._blocos.get(hash_bloco)
+        if resultado is not None:
+            self.reaproveitados += 1
+            self._novos[hash_bloco] = resultado
+        return resultado
+
+    def registrar(self, hash_bloco: str, resultado: Tuple[str, list]):
+        self.reprocessados += 1
+        self._novos[hash_bloco] = resultado
+
+    def concluir(self, assinatura: str, colunas: List[str], unidades: TabelaUnidades) -> dict:
+        """
+        Calcula o delta contra a execução anterior e grava o índice desta
+        (só com os blocos vistos agora).
+        """
+        antes = self._linhas
+        atuais = dict(unidades.itens())
+        adicionadas = [k for k in atuais if k not in antes]
+        removidas = [k for k in antes if k not in atuais]
+        alteradas = {}
+        for chave, linha in atuais.items():
+            if chave not in antes:
+                continue
+            diferencas = {
+                col: [a or "", b or ""]
+                for col, a, b in zip(colunas, antes[chave], linha)
+                if (a or "") != (b or "")
+            }
+            if diferencas:
+                alteradas[chave] = diferencas
+        self.delta = {
+            "indice_anterior": self.anterior,
+            "adicionadas": adicionadas,
+            "removidas": removidas,
+            "alteradas": alteradas,
+            "blocos_reaproveitados": self.reaproveitados,
+            "blocos_reprocessados": self.reprocessados,
+        }
+
+        inalterado = (self.anterior and not self.reprocessados and len(self._novos) == len(self._blocos)
+                      and not (adicionadas or removidas or alteradas))
+        if not inalterado:
+            self._gravar(assinatura, atuais)
+        return self.delta
+
+    def _gravar(self, assinatura: str, linhas: dict):
+        entrada = {
+            "assinatura": assinatura,
+            "blocos": {h: [chave, valores] for h, (chave, valores) in self._novos.items()},
+            "linhas": linhas,
+        }
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        # json.dumps de uma vez (encoder em C) e compressão rápida: o índice é regravado a cada execução
+        texto = json.dumps(entrada, ensure_ascii=False, separators=(",", ":"))
+        temporario = self.caminho + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temporario, "wb", compresslevel=1) as f:
+            f.write(texto.encode("utf-8"))
+        os.replace(temporario, self.caminho)
+
+    def salvar_delta(self, caminho: str) -> str:
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.delta, f, ensure_ascii=False, indent=2)
+        return caminho
+
+
+class MetricasExtracao:
+    """
+    Tempo acumulado, chamadas, resultados vazios e falhas por extrator de campo
+    e por etapa do pipeline, mais quantas unidades preencheram cada coluna.
+    Só existe quando configurar_metricas() é chamado: desligado, o custo é um
+    teste de None por campo. Usa só dicts simples, para ir e voltar dos
+    processos do pool (ver mesclar).
+    """
+
+    def __init__(self):
+        self.etapas = {}
+        self.extratores = {}
+        self.colunas = {}
+        self.erro = None
+
+    @staticmethod
+    def _contador() -> dict:
+        return {"chamadas": 0, "segundos": 0.0, "vazios": 0, "falhas": 0}
+
+    def _registrar(self, grupo: dict, nome: str, segundos: float, vazio: bool = False, falha: bool = False):
+        c = grupo.get(nome)
+        if c is None:
+            c = grupo[nome] = self._contador()
+        c["chamadas"] += 1
+        c["segundos"] += segundos
+        c["vazios"] += vazio
+        c["falhas"] += falha
+
+    def medir_campo(self, nome: str, funcao, *args):
+        """Chama funcao(*args) contando tempo, resultado vazio ou exceção sob `nome`."""
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args)
+        except Exception:
+            self._registrar(self.extratores, nome, time.perf_counter() - inicio, falha=True)
+            raise
+        vazio = not resultado or (isinstance(resultado, tuple) and not any(resultado))
+        self._registrar(self.extratores, nome, time.perf_counter() - inicio, vazio=vazio)
+        return resultado
+
+    @contextlib.contextmanager
+    def medir_etapa(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._falhou(nome, time.perf_counter() - inicio, e)
+            raise
+        self._registrar(self.etapas, nome, time.perf_counter() - inicio)
+
+    def _falhou(self, etapa: str, segundos: float, e: Exception):
+        self._registrar(self.etapas, etapa, segundos, falha=True)
+        if self.erro is None:  # a primeira falha é a causa; as etapas externas só repassam
+            self.erro = {"etapa": etapa, "tipo": type(e).__name__, "mensagem": str(e)}
+
+    def medir_iterador(self, nome: str, partes: Iterable):
+        """Repassa os itens somando só o tempo gasto esperando cada um (ex.: pipe do pdftotext)."""
+        segundos = 0.0
+        iterador = iter(partes)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    parte = next(iterador)
+                except StopIteration:
+                    segundos += time.perf_counter() - inicio
+                    break
+                segundos += time.perf_counter() - inicio
+                yield parte
+        except Exception as e:
+            self._falhou(nome, segundos, e)
+            raise
+        self._registrar(self.etapas, nome, segundos)
+
+    def contar_colunas(self, tabela: TabelaUnidades):
+        """Quantas unidades preencheram (ou deixaram vazia) cada coluna da saída."""
+        for col, valores in tabela.por_coluna():
+            c = self.colunas.setdefault(col, {"preenchidas": 0, "vazias": 0})
+            preenchidas = sum(1 for v in valores if v)
+            c["preenchidas"] += preenchidas
+            c["vazias"] += len(valores) - preenchidas
+
+    def mesclar(self, outra: dict):
+        """Soma as métricas de outro processo (no formato de como_dict)."""
+        for grupo, destino in (("etapas", self.etapas), ("extratores", self.extratores)):
+            for nome, c in outra.get(grupo, {}).items():
+                atual = destino.setdefault(nome, self._contador())
+                for k in atual:
+                    atual[k] += c.get(k, 0)
+        for col, c in outra.get("colunas", {}).items():
+            atual = self.colunas.setdefault(col, {"preenchidas": 0, "vazias": 0})
+            atual["preenchidas"] += c["preenchidas"]
+            atual["vazias"] += c["vazias"]
+        if self.erro is None:
+            self.erro = outra.get("erro")
+
+    def como_dict(self) -> dict:
+        def arredondar(grupo: dict) -> dict:
+            return {nome: dict(c, segundos=round(c["segundos"], 6)) for nome, c in grupo.items()}
+        return {
+            "etapas": arredondar(self.etapas),
+            "extratores": arredondar(self.extratores),
+            "colunas": copy.deepcopy(self.colunas),
+            "erro": self.erro,
+        }
+
+    def salvar(self, caminho: str) -> str:
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.como_dict(), f, ensure_ascii=False, indent=2)
+        return caminho
+
+
+def _medir(metricas: Optional[MetricasExtracao], nome: str, funcao, *args):
+    """funcao(*args), medida em `metricas` quando as métricas estão ligadas."""
+    if metricas is None:
+        return funcao(*args)
+    return metricas.medir_campo(nome, funcao, *args)
+
+
+def _etapa(metricas: Optional[MetricasExtracao], nome: str):
+    return metricas.medir_etapa(nome) if metricas is not None else contextlib.nullcontext()
+
+
+class JobCancelado(RuntimeError):
+    """O job foi cancelado (arquivo ARQUIVO_CANCELAR_JOB criado na pasta do job)."""
+
+
+class ProgressoJob:
+    """
+    Progresso de um job gravado em <pasta do job>/status.json: páginas lidas
+    (quebras de página no texto do pdftotext), blocos de unidade processados e
+    ETA. A cada gravação verifica o arquivo de cancelamento e interrompe a
+    extração com JobCancelado.
+    """
+
+    def __init__(self, pasta_job: str, status: dict, total_paginas: Optional[int] = None):
+        self.pasta_job = pasta_job
+        self.status = status
+        self.total_paginas = total_paginas
+        self.paginas = 0
+        self.unidades = 0
+        self.inicio = time.perf_counter()
+        self._ultima_gravacao = 0.0
+
+    def contar_paginas(self, partes: Iterable[str]) -> Iterator[str]:
+        for parte in partes:
+            self.paginas += parte.count('\f')
+            self.atualizar()
+            yield parte
+
+    def contar_intervalos(self, partes: Iterable[dict], intervalos: List[Tuple[int, int]]) -> Iterator[dict]:
+        """Extração paralela: as páginas de cada intervalo contam quando ele volta do worker."""
+        for parte, (primeira, ultima) in zip(partes, intervalos):
+            self.paginas += ultima - primeira + 1
+            self.atualizar()
+            yield parte
+
+    def contar_blocos(self, blocos: Iterable[str]) -> Iterator[str]:
+        for bloco in blocos:
+            self.unidades += 1
+            self.atualizar()
+            yield bloco
+
+    def contar_unidades(self, n: int):
+        """Unidades extraídas fora deste processo (ex.: um condomínio que voltou do pool)."""
+        self.unidades += n
+        self.atualizar()
+
+    def atualizar(self, forcar: bool = False):
+        agora = time.perf_counter()
+        if not forcar and agora - self._ultima_gravacao < INTERVALO_STATUS_JOB:
+            return
+        self._ultima_gravacao = agora
+        if os.path.exists(os.path.join(self.pasta_job, ARQUIVO_CANCELAR_JOB)):
+            raise JobCancelado("Job cancelado.")
+        self.preencher_status()
+        gravar_status_job(self.pasta_job, self.status)
+
+    def preencher_status(self, concluido: bool = False):
+        """Contagens, percentual e ETA atuais em self.status (concluido=True: 100%)."""
+        decorrido = time.perf_counter() - self.inicio
+        percentual = eta = None
+        if concluido:
+            percentual, eta = 100.0, 0
+        elif self.total_paginas and self.paginas:
+            percentual = round(100 * min(self.paginas / self.total_paginas, 1), 1)
+            eta = round(decorrido / self.paginas * max(self.total_paginas - self.paginas, 0), 1)
+        elif self.total_paginas:
+            percentual = 0.0
+        self.status.update({
+            "paginas": self.paginas,
+            "total_paginas": self.total_paginas,
+            "unidades": self.unidades,
+            "percentual": percentual,
+            "eta_s": eta,
+            "decorrido_s": round(decorrido, 1),
+        })
+
+
 class ExtractorPDF:
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", usar_scanner: bool = True):
         self.modelo_path = None
         self.pasta_saida = None
         self.colunas_modelo: List[str] = []
+        self.cache: Optional[CacheResultados] = None
+        self.metricas: Optional[MetricasExtracao] = None
+        self.incremental: Optional[IndiceIncremental] = None
+        self.progresso: Optional[ProgressoJob] = None
+        # "Cód. Condomínio" das unidades (cada condomínio em processar_por_condominio)
+        self.codigo_condominio = CODIGO_CONDOMINIO_PADRAO
 
         with open(config_path, 'r', encoding='utf-8') as f:
             config = json.load(f)
 
+        self.config = config
         self.MAPEAMENTO = config.get("mapeamento", {})
+        self.plano = plano_extracao(self.MAPEAMENTO, self.colunas_modelo)
         self.tipos_logradouro = config.get("tipos_logradouro", [])
+        self.matcher_logradouro = MatcherLogradouro(self.tipos_logradouro)
+
+        # usar_scanner=False força as funções extrair_* (implementação de referência)
+        self.usar_scanner = usar_scanner
+        self.scanner = ScannerBloco(self)
 
     def configurar_modelo(self, modelo_path: str):
         if not os.path.exists(modelo_path):
             raise FileNotFoundError(f"Modelo não encontrado: {modelo_path}")
+        import pandas as pd
         self.modelo_path = modelo_path
         self.colunas_modelo = pd.read_excel(modelo_path).columns.tolist()
+        self.plano = plano_extracao(self.MAPEAMENTO, self.colunas_modelo)
 
     def configurar_pasta_saida(self, pasta_saida: str):
         os.makedirs(pasta_saida, exist_ok=True)
         self.pasta_saida = pasta_saida
 
+    def configurar_cache(self, pasta_cache: str = CACHE_DIR_PADRAO,
+                         max_mb: float = CACHE_MAX_MB, max_dias: float = CACHE_MAX_DIAS):
+        self.cache = CacheResultados(pasta_cache, max_mb=max_mb, max_dias=max_dias)
+
+    def configurar_incremental(self, caminho_indice: Optional[str]):
+        """
+        Modo incremental com o índice em `caminho_indice` (None desliga): só
+        os blocos que mudaram desde a última extração são analisados, e o
+        delta fica em self.incremental.delta. Usa a extração serial e não
+        passa pelo cache de resultados (que não guarda as chaves das unidades).
+        """
+        self.incremental = IndiceIncremental(caminho_indice) if caminho_indice else None
+
+    def configurar_metricas(self, ligar: bool = True) -> Optional[MetricasExtracao]:
+        """Liga (com contadores zerados) ou desliga as métricas por campo e por etapa."""
+        self.metricas = MetricasExtracao() if ligar else None
+        return self.metricas
+
     # ----------------- utilidades -----------------
 
     def limpar_texto(self, texto: str, maiusculo: bool = True, remover_pontuacao: bool = True) -> str:
@@ -157,16 +1464,8 @@ class ExtractorPDF:
     def extrair_endereco_refinado(self, logradouro_completo: str) -> Tuple[str, str, str, str]:
         if not logradouro_completo:
             return '', '', '', ''
-        tipo_logradouro = ''
-        resto_endereco = logradouro_completo
-        for tipo in self.tipos_logradouro:
-            padrao = re.compile(rf'^\s*{tipo}\b\s*(.*)', re.IGNORECASE)
-            if padrao.match(logradouro_completo):
-                match = padrao.search(logradouro_completo)
-                tipo_logradouro = tipo
-                resto_endereco = match.group(1).strip()
-                break
-        match_numero = re.search(r'\b(\d+)\b', resto_endereco)
+        tipo_logradouro, resto_endereco = self.matcher_logradouro.separar(logradouro_completo)
+        match_numero = RE_NUMERO_ENDERECO.search(resto_endereco)
         if match_numero:
             numero = match_numero.group(1)
             posicao_numero = match_numero.start()
@@ -184,7 +1483,7 @@ class ExtractorPDF:
         bairro = partes[1].strip() if len(partes) > 1 else ""
         cidade = partes[2].strip() if len(partes) > 2 else ""
         estado = partes[3].strip() if len(partes) > 3 else ""
-        cep_match = re.search(r'\d{5}-\d{3}', endereco_completo)
+        cep_match = RE_CEP.search(endereco_completo)
         cep = cep_match.group(0) if cep_match else ""
         tipo_logradouro, nome_rua, numero, complemento = self.extrair_endereco_refinado(logradouro_completo)
         return tipo_logradouro, nome_rua, numero, bairro, cidade, estado, cep, complemento
@@ -278,143 +1577,407 @@ class ExtractorPDF:
 
     # ----------------- núcleo -----------------
 
-    def extrair_dados(self, texto: str) -> List[dict]:
-        if not self.colunas_modelo:
-            raise ValueError("Modelo não configurado. Use configurar_modelo() primeiro.")
-
-        # aceita unidade alfa-numérica (ex.: VG0196), e não apenas dígitos
-        unidade_regex = r'(Bloco:\s*\w+\s+Unidade:\s*\S+\s*[-–].+?Código do cliente:\s*\d+)'
-        indices = [m.start() for m in re.finditer(unidade_regex, texto, flags=re.DOTALL | re.IGNORECASE)]
+    def _iterar_blocos(self, texto: str):
+        """Divide o texto do relatório em blocos de unidade (sem quebras de página)."""
+        indices = [m.start() for m in self.scanner.re_unidade.finditer(texto)]
         indices.append(len(texto))
-
-        unidades_dict = {}
         for i in range(len(indices) - 1):
             bloco = texto[indices[i]:indices[i + 1]]
-            bloco = bloco.replace('\x0c', '').replace('\f', '')  # remove quebras de página
+            yield bloco.replace('\x0c', '').replace('\f', '')  # remove quebras de página
+
+    def _iterar_blocos_stream(self, partes: Iterable[str]) -> Iterator[str]:
+        """
+        Igual a _iterar_blocos, mas consome o texto em pedaços (ex.: stdout do
+        pdftotext) e entrega cada bloco assim que o cabeçalho seguinte chega.
+        Só o bloco corrente fica em memória.
+        """
+        re_unidade = self.scanner.re_unidade
+        buffer = ""
+        tem_bloco = False   # buffer começa no cabeçalho do bloco corrente
+        pos = 0             # onde continuar a busca pelo próximo cabeçalho
+        for parte in itertools.chain(partes, [None]):
+            fim = parte is None
+            if not fim:
+                buffer += parte
+            while True:
+                m = re_unidade.search(buffer, pos)
+                # cabeçalho encostado no fim do buffer ainda pode crescer
+                # (\d+ do código do cliente): espera o próximo pedaço
+                if not m or (not fim and m.end() >= len(buffer)):
+                    break
+                if tem_bloco:
+                    yield buffer[:m.start()].replace('\x0c', '').replace('\f', '')
+                buffer = buffer[m.start():]
+                pos = m.end() - m.start()
+                tem_bloco = True
+        if tem_bloco:
+            yield buffer.replace('\x0c', '').replace('\f', '')
+
+    def _iterar_blocos_mapeados(self, texto: TextoMapeado, inicio_trecho: int = 0,
+                                fim_trecho: Optional[int] = None) -> Iterator[str]:
+        """
+        Igual a _iterar_blocos, mas sobre o texto mapeado (ou um trecho dele): os
+        blocos são offsets no arquivo e cada um só é decodificado quando chega a vez dele.
+        """
+        for inicio, fim in texto.offsets_blocos(self.scanner.re_unidade_bytes, inicio_trecho, fim_trecho):
+            yield texto.texto(inicio, fim)
+
+    def _campos_bloco_referencia(self, bloco: str) -> Optional[Tuple[str, dict]]:
+        """Extrai os campos de um bloco chamando cada função extrair_* separadamente."""
+        cabecalho = re.search(
+            r'Bloco:\s*(\w+)\s+Unidade:\s*(\S+)\s*[-–]\s*(.+?)\s+Código do cliente:\s*(\d+)',
+            bloco, re.DOTALL | re.IGNORECASE
+        )
+        if not cabecalho:
+            return None
+
+        bloco_id, unidade_raw, nome, cod_cliente = cabecalho.groups()
+        unidade_raw = unidade_raw.strip()
+        if unidade_raw.isdigit():
+            unidade_fmt = unidade_raw.zfill(4)
+        else:
+            unidade_fmt = unidade_raw.upper()
+
+        chave_unidade = f"{bloco_id}_{unidade_fmt}"
+
+        campos = {col: "" for col in self.colunas_modelo}
+        campos["Cód. Condomínio"] = self.codigo_condominio
+        campos["Cód. Bloco"] = bloco_id
+        campos["Cód. Unidade"] = unidade_fmt
+        campos["Nome"] = self.limpar_texto(nome)
+        if "Código do Cliente" in campos:
+            campos["Código do Cliente"] = cod_cliente
+
+        m = self.metricas
+
+        # CPF/CNPJ (robusto contra cabeçalho do condomínio)
+        campos["CPF/CNPJ"] = _medir(m, "cpf_cnpj", self.extrair_cpf_cnpj, bloco)
+
+        # Emails / Telefones
+        campos["E-mails"] = ", ".join(sorted(set(_medir(m, "emails", self.extrair_emails, bloco))))
+        campos["Telefones Celular"] = ", ".join(sorted(set(_medir(m, "celulares", self.extrair_celulares, bloco))))
+        for tipo in ["residencial", "comercial"]:
+            padrao = rf'Telefone {tipo}\s*-\s*([\d\s().-]+)'
+            encontrados = re.findall(padrao, bloco, re.IGNORECASE)
+            if tipo == "residencial":
+                campos["Telefones Residencial"] = ", ".join(sorted(set(encontrados)))
+            else:
+                campos["Telefones Comercial"] = ", ".join(sorted(set(encontrados)))
+
+        # Tipo de unidade: pega exatamente entre "Tipo de unidade" e "Dias de prazo"
+        tipo_unidade = _medir(m, "tipo_unidade", self.extrair_texto_entre_campos, bloco, "Tipo de unidade", "Dias de prazo")
+        # se unidade começa com VG e o campo veio vazio, marcar como VAGA
+        if not tipo_unidade and unidade_fmt.upper().startswith("VG"):
+            tipo_unidade = DEFAULT_TIPO_VAGA
+        campos["Cód. Tipo Unidade"] = tipo_unidade
 
-            cabecalho = re.search(
-                r'Bloco:\s*(\w+)\s+Unidade:\s*(\S+)\s*[-–]\s*(.+?)\s+Código do cliente:\s*(\d+)',
-                bloco, re.DOTALL | re.IGNORECASE
+        campos["Tipo Corresp. Cobrança"] = _medir(m, "tipo_correspondencia", self.extrair_valor_simples,
+                                                  bloco, "Tipo de correspondência", None, True)
+        campos["Cód. Classificação Unidade"] = _medir(m, "classificacao", self.extrair_valor_simples,
+                                                      bloco, "Classificação", ["-"])
+        campos["Aos Cuidados"] = _medir(m, "aos_cuidados", self.extrair_ac_refinado, bloco)
+
+        # Endereço (último do bloco)
+        enderecos = re.findall(r'Endereço:\s*([^\n\r\f]+)', bloco, flags=re.IGNORECASE)
+        if enderecos:
+            raw = enderecos[-1].strip()
+            tipo_log, nome_rua, numero, bairro, cidade, estado, cep, compl = _medir(
+                m, "endereco", self.extrair_campos_endereco, raw
             )
-            if not cabecalho:
-                continue
+            campos["Logradouro Cobrança"] = tipo_log
+            campos["Endereço Cobrança"] = nome_rua
+            campos["Número Cobrança"] = numero
+            campos["Bairro Cobrança"] = bairro
+            campos["Cidade Cobrança"] = cidade
+            campos["Estado Cobrança"] = estado
+            campos["CEP Cobrança"] = cep
+            campos["Complemento Cobrança"] = compl
+
+        # Frações/áreas
+        fx = re.findall(r'Fração unidade:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
+        campos["Fração Unidade"] = self.converter_ponto_para_virgula(fx[-1]) if fx else ""
+        mt = re.findall(r'Metragem total:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
+        campos["Metragem"] = self.converter_ponto_para_virgula(mt[-1]) if mt else ""
+        ac = re.findall(r'Área construída:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
+        campos["Área Construída"] = self.converter_ponto_para_virgula(ac[-1]) if ac else ""
+
+        # Frações extras
+        for j in range(1, 10 + 1):
+            campo_nome = f'Fração Extra {j}'
+            matches = re.findall(rf'Fração extra {j}:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
+            if campo_nome in campos:
+                campos[campo_nome] = self.converter_ponto_para_virgula(matches[-1]) if matches else ""
+
+        if "Fração Garagem" in self.colunas_modelo:
+            fg = re.findall(r'Fração garagem:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
+            campos["Fração Garagem"] = self.converter_ponto_para_virgula(fg[-1]) if fg else ""
+
+        return chave_unidade, campos
+
+    def _mapear_modelo(self, campos: dict) -> list:
+        """Valores do bloco na ordem das colunas do modelo (a linha de TabelaUnidades)."""
+        return [campos.get(origem, "") if origem else "" for _, origem in self.plano.saidas]
+
+    def extrair_dados(self, texto: str) -> TabelaUnidades:
+        return self.extrair_dados_blocos(self._iterar_blocos(texto))
 
-            bloco_id, unidade_raw, nome, cod_cliente = cabecalho.groups()
-            unidade_raw = unidade_raw.strip()
-            if unidade_raw.isdigit():
-                unidade_fmt = unidade_raw.zfill(4)
+    def extrair_dados_stream(self, partes: Iterable[str]) -> TabelaUnidades:
+        """Extrai as unidades a partir do texto do relatório recebido em pedaços."""
+        return self.extrair_dados_blocos(self._iterar_blocos_stream(partes))
+
+    def extrair_dados_mapeado(self, caminho_txt: str) -> TabelaUnidades:
+        """Extrai as unidades do texto do pdftotext em `caminho_txt`, mapeado em memória (mmap)."""
+        with TextoMapeado(caminho_txt) as texto:
+            return self.extrair_dados_blocos(self._iterar_blocos_mapeados(texto))
+
+    def _extrair_bloco(self, bloco: str) -> Optional[Tuple[str, list]]:
+        """(chave_unidade, linha já mapeada para o modelo) do bloco, ou None."""
+        if self.usar_scanner:
+            resultado = self.scanner.escanear(bloco, self.metricas)
+        else:
+            resultado = self._campos_bloco_referencia(bloco)
+        if resultado is None:
+            return None
+        chave_unidade, campos = resultado
+        return chave_unidade, self._mapear_modelo(campos)
+
+    def _acumular(self, resultados: Iterable[Optional[Tuple[str, list]]]) -> TabelaUnidades:
+        tabela = TabelaUnidades(self.colunas_modelo)
+        acumular = tabela.acumular
+        for resultado in resultados:
+            if resultado is not None:
+                acumular(*resultado)
+        return tabela
+
+    def extrair_dados_blocos(self, blocos: Iterable[str]) -> TabelaUnidades:
+        if not self.colunas_modelo:
+            raise ValueError("Modelo não configurado. Use configurar_modelo() primeiro.")
+        if self.progresso is not None:
+            blocos = self.progresso.contar_blocos(blocos)
+        if self.incremental is not None:
+            return self._extrair_blocos_incremental(blocos)
+        return self._acumular(self._extrair_bloco(bloco) for bloco in blocos)
+
+    def _extrair_blocos_incremental(self, blocos: Iterable[str]) -> TabelaUnidades:
+        """extrair_dados_blocos reaproveitando os blocos inalterados do índice incremental."""
+        indice = self.incremental
+        assinatura = IndiceIncremental.assinatura(self.config, self.colunas_modelo)
+        indice.carregar(assinatura)
+
+        def resultados():
+            for bloco in blocos:
+                h = IndiceIncremental.hash_bloco(bloco)
+                resultado = indice.obter(h)
+                if resultado is None:
+                    resultado = self._extrair_bloco(bloco)
+                    if resultado is not None:
+                        indice.registrar(h, resultado)
+                yield resultado
+
+        tabela = self._acumular(resultados())
+        with _etapa(self.metricas, "indice_incremental"):
+            indice.concluir(assinatura, self.colunas_modelo, tabela)
+        return tabela
+
+    # ----------------- extração paralela -----------------
+
+    def _dividir_intervalo(self, texto: str) -> dict:
+        """
+        Processa o texto de um intervalo de páginas (no worker). Só os blocos
+        internos são definitivos; o texto antes do primeiro cabeçalho, o primeiro
+        bloco e o último (que pode continuar no intervalo seguinte) voltam crus
+        para a costura em _costurar_intervalos.
+        """
+        inicios = [m.start() for m in self.scanner.re_unidade.finditer(texto)]
+        if not inicios:
+            return {"prefixo": texto, "primeiro": None, "resultado_primeiro": None, "resultados": [], "cauda": None}
+        inicios.append(len(texto))
+        n = len(inicios) - 1
+        parte = {
+            "prefixo": texto[:inicios[0]],
+            "primeiro": texto[inicios[0]:inicios[1]],
+            "resultado_primeiro": None,
+            "resultados": [],
+            "cauda": None,
+        }
+        if n > 1:
+            parte["resultado_primeiro"] = self._extrair_bloco(parte["primeiro"].replace('\x0c', ''))
+            parte["resultados"] = [
+                self._extrair_bloco(texto[inicios[i]:inicios[i + 1]].replace('\x0c', ''))
+                for i in range(1, n - 1)
+            ]
+            parte["cauda"] = texto[inicios[n - 1]:]
+        return parte
+
+    def _costurar_intervalos(self, partes: Iterable[dict]) -> Iterator[Optional[Tuple[str, list]]]:
+        """
+        Junta os resultados dos intervalos, em ordem, refazendo a divisão de
+        blocos nos limites para obter exatamente os blocos da execução serial.
+        """
+        re_unidade = self.scanner.re_unidade
+        pendente = ""   # bloco ainda aberto (ou preâmbulo do relatório)
+        for parte in partes:
+            if parte["primeiro"] is None:
+                pendente += parte["prefixo"]
+                continue
+            juncao = pendente + parte["prefixo"]
+            texto = juncao + parte["primeiro"]
+            inicios = [m.start() for m in re_unidade.finditer(texto)]
+            for i in range(len(inicios) - 1):
+                yield self._extrair_bloco(texto[inicios[i]:inicios[i + 1]].replace('\x0c', ''))
+            ultimo = inicios[-1]
+            if parte["cauda"] is None:
+                # o primeiro bloco do intervalo é também o último: segue aberto
+                pendente = texto[ultimo:]
+                continue
+            if ultimo == len(juncao):
+                yield parte["resultado_primeiro"]
             else:
-                unidade_fmt = unidade_raw.upper()
-
-            chave_unidade = f"{bloco_id}_{unidade_fmt}"
-
-            campos = {col: "" for col in self.colunas_modelo}
-            campos["Cód. Condomínio"] = "000000"
-            campos["Cód. Bloco"] = bloco_id
-            campos["Cód. Unidade"] = unidade_fmt
-            campos["Nome"] = self.limpar_texto(nome)
-            if "Código do Cliente" in campos:
-                campos["Código do Cliente"] = cod_cliente
-
-            # CPF/CNPJ (robusto contra cabeçalho do condomínio)
-            campos["CPF/CNPJ"] = self.extrair_cpf_cnpj(bloco)
-
-            # Emails / Telefones
-            campos["E-mails"] = ", ".join(sorted(set(self.extrair_emails(bloco))))
-            campos["Telefones Celular"] = ", ".join(sorted(set(self.extrair_celulares(bloco))))
-            for tipo in ["residencial", "comercial"]:
-                padrao = rf'Telefone {tipo}\s*-\s*([\d\s().-]+)'
-                encontrados = re.findall(padrao, bloco, re.IGNORECASE)
-                if tipo == "residencial":
-                    campos["Telefones Residencial"] = ", ".join(sorted(set(encontrados)))
-                else:
-                    campos["Telefones Comercial"] = ", ".join(sorted(set(encontrados)))
+                # um cabeçalho que começa antes do limite termina no código do
+                # cliente do primeiro bloco do intervalo: refaz esse bloco
+                yield self._extrair_bloco(texto[ultimo:].replace('\x0c', ''))
+            yield from parte["resultados"]
+            pendente = parte["cauda"]
+        for bloco in self._iterar_blocos(pendente):
+            yield self._extrair_bloco(bloco)
 
-            # Tipo de unidade: pega exatamente entre "Tipo de unidade" e "Dias de prazo"
-            tipo_unidade = self.extrair_texto_entre_campos(bloco, "Tipo de unidade", "Dias de prazo")
-            # se unidade começa com VG e o campo veio vazio, marcar como VAGA
-            if not tipo_unidade and unidade_fmt.upper().startswith("VG"):
-                tipo_unidade = DEFAULT_TIPO_VAGA
-            campos["Cód. Tipo Unidade"] = tipo_unidade
+    def _mesclar_metricas(self, partes: Iterable[dict]) -> Iterator[dict]:
+        for parte in partes:
+            self.metricas.mesclar(parte.pop("metricas", {}))
+            yield parte
 
-            campos["Tipo Corresp. Cobrança"] = self.extrair_valor_simples(bloco, "Tipo de correspondência", split_first_word=True)
-            campos["Cód. Classificação Unidade"] = self.extrair_valor_simples(bloco, "Classificação", split_chars=["-"])
-            campos["Aos Cuidados"] = self.extrair_ac_refinado(bloco)
-
-            # Endereço (último do bloco)
-            enderecos = re.findall(r'Endereço:\s*([^\n\r\f]+)', bloco, flags=re.IGNORECASE)
-            if enderecos:
-                raw = enderecos[-1].strip()
-                tipo_log, nome_rua, numero, bairro, cidade, estado, cep, compl = self.extrair_campos_endereco(raw)
-                campos["Logradouro Cobrança"] = tipo_log
-                campos["Endereço Cobrança"] = nome_rua
-                campos["Número Cobrança"] = numero
-                campos["Bairro Cobrança"] = bairro
-                campos["Cidade Cobrança"] = cidade
-                campos["Estado Cobrança"] = estado
-                campos["CEP Cobrança"] = cep
-                campos["Complemento Cobrança"] = compl
-
-            # Frações/áreas
-            fx = re.findall(r'Fração unidade:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
-            campos["Fração Unidade"] = self.converter_ponto_para_virgula(fx[-1]) if fx else ""
-            mt = re.findall(r'Metragem total:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
-            campos["Metragem"] = self.converter_ponto_para_virgula(mt[-1]) if mt else ""
-            ac = re.findall(r'Área construída:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
-            campos["Área Construída"] = self.converter_ponto_para_virgula(ac[-1]) if ac else ""
-
-            # Frações extras
-            for j in range(1, 10 + 1):
-                campo_nome = f'Fração Extra {j}'
-                matches = re.findall(rf'Fração extra {j}:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
-                if campo_nome in campos:
-                    campos[campo_nome] = self.converter_ponto_para_virgula(matches[-1]) if matches else ""
-
-            if "Fração Garagem" in self.colunas_modelo:
-                fg = re.findall(r'Fração garagem:\s*([\d,.]+)', bloco, flags=re.IGNORECASE)
-                campos["Fração Garagem"] = self.converter_ponto_para_virgula(fg[-1]) if fg else ""
-
-            # Mapeamento p/ modelo final
-            campos_modelo = {
-                col: campos.get(self.MAPEAMENTO.get(col, col), "") if self.MAPEAMENTO.get(col, col) else ""
-                for col in self.colunas_modelo
-            }
-            unidades_dict[chave_unidade] = self.merge_dados(unidades_dict.get(chave_unidade, {}), campos_modelo)
+    def _copia_para_pool(self) -> "ExtractorPDF":
+        """
+        Extrator enviado aos processos do pool: sem o progresso do job, que só o
+        processo principal grava (contando o que volta de cada worker).
+        """
+        if self.progresso is None:
+            return self
+        copia = copy.copy(self)
+        copia.progresso = None
+        return copia
 
-        return list(unidades_dict.values())
+    def extrair_dados_paralelo(self, exe: str, caminho_pdf: str, total_paginas: int, workers: int) -> TabelaUnidades:
+        """Extrai intervalos de páginas (pdftotext -f/-l) em um pool de processos."""
+        if not self.colunas_modelo:
+            raise ValueError("Modelo não configurado. Use configurar_modelo() primeiro.")
+        intervalos = _dividir_paginas(total_paginas, workers)
+        tarefas = [(exe, caminho_pdf, a, b) for a, b in intervalos]
+        with _abrir_pool(workers, self._copia_para_pool()) as pool:
+            partes = pool.map(_extrair_intervalo, tarefas)
+            if self.progresso is not None:
+                partes = self.progresso.contar_intervalos(partes, intervalos)
+            if self.metricas is not None:
+                partes = self._mesclar_metricas(partes)
+            resultados = self._costurar_intervalos(partes)
+            if self.progresso is not None:
+                resultados = self.progresso.contar_blocos(resultados)
+            return self._acumular(resultados)
 
-    def processar_pdf(self, caminho_pdf: str, pdftotext_path: Optional[str] = None) -> Optional[pd.DataFrame]:
+    def extrair_linhas_pdf(self, caminho_pdf: str, pdftotext_path: Optional[str] = None,
+                           streaming: bool = True, workers: int = 1, usar_cache: bool = True,
+                           mapear_texto: bool = False) -> TabelaUnidades:
+        """
+        Extrai as unidades do PDF numa TabelaUnidades (colunas do modelo, sem
+        montar DataFrame). Com streaming=True (padrão) o texto do pdftotext é
+        lido direto do pipe, bloco a bloco; com streaming=False grava
+        <pasta_saida>/<nome>.txt e lê o arquivo inteiro (modo antigo).
+        Com mapear_texto=True o texto vai para um arquivo (o .txt acima, ou um
+        temporário apagado no fim) percorrido com mmap por offsets de bloco:
+        o pico de memória não cresce com o tamanho do relatório.
+        Com workers > 1 o PDF é dividido em intervalos de páginas processados
+        em paralelo (requer `pdfinfo`; sem ele, cai no modo serial).
+        Se configurar_cache() foi chamado, um PDF já processado com a mesma
+        config e modelo volta direto do cache (usar_cache=False ignora).
+        Com configurar_incremental(), cache e workers são ignorados.
+        """
         if not os.path.exists(caminho_pdf):
             raise FileNotFoundError(f"PDF não encontrado: {caminho_pdf}")
+        m = self.metricas
 
-        exe = _resolver_pdftotext(pdftotext_path)
+        if self.incremental is not None:
+            usar_cache, workers = False, 1
 
-        nome_txt = os.path.splitext(os.path.basename(caminho_pdf))[0] + ".txt"
-        caminho_txt = os.path.join(self.pasta_saida, nome_txt)
+        chave_cache = None
+        if self.cache and usar_cache:
+            with _etapa(m, "cache"):
+                chave_cache = self.cache.chave(caminho_pdf, self.config, self.colunas_modelo)
+                dados = self.cache.obter(chave_cache)
+            if dados:
+                if m is not None:
+                    m.contar_colunas(dados)
+                return dados
 
-        try:
-            subprocess.run([exe, '-layout', caminho_pdf, caminho_txt], check=True)
-            with open(caminho_txt, "r", encoding="utf-8") as f:
-                texto = f.read()
+        with _etapa(m, "resolver_pdftotext"):
+            exe = _resolver_pdftotext(pdftotext_path)
+            pdfinfo = _resolver_pdfinfo(exe) if workers > 1 else None
 
-            dados = self.extrair_dados(texto)
-            if not dados:
-                return None
-
-            df = pd.DataFrame(dados)
-
-            # Garante todas as colunas do modelo
-            for col in self.colunas_modelo:
-                if col not in df.columns:
-                    df[col] = ""
+        try:
+            if pdfinfo:
+                with _etapa(m, "pdfinfo"):
+                    total_paginas = _contar_paginas(pdfinfo, caminho_pdf)
+                with _etapa(m, "paralelo"):
+                    dados = self.extrair_dados_paralelo(exe, caminho_pdf, total_paginas, workers)
+            elif mapear_texto:
+                if streaming:
+                    descritor, caminho_txt = tempfile.mkstemp(suffix=".txt")
+                    os.close(descritor)
+                else:
+                    nome_txt = os.path.splitext(os.path.basename(caminho_pdf))[0] + ".txt"
+                    caminho_txt = os.path.join(self.pasta_saida, nome_txt)
+                try:
+                    with _etapa(m, "pdftotext"):
+                        subprocess.run([exe, *OPCOES_PDFTOTEXT, caminho_pdf, caminho_txt], check=True)
+                    with _etapa(m, "parsing"):
+                        dados = self.extrair_dados_mapeado(caminho_txt)
+                finally:
+                    if streaming and os.path.exists(caminho_txt):
+                        os.remove(caminho_txt)
+            elif streaming:
+                partes = _stream_pdftotext(exe, caminho_pdf)
+                if self.progresso is not None:
+                    partes = self.progresso.contar_paginas(partes)
+                if m is not None:
+                    partes = m.medir_iterador("pdftotext", partes)
+                # "parsing" inclui a espera pelo pipe, registrada à parte em "pdftotext"
+                with _etapa(m, "parsing"):
+                    dados = self.extrair_dados_stream(partes)
+            else:
+                nome_txt = os.path.splitext(os.path.basename(caminho_pdf))[0] + ".txt"
+                caminho_txt = os.path.join(self.pasta_saida, nome_txt)
+                with _etapa(m, "pdftotext"):
+                    subprocess.run([exe, *OPCOES_PDFTOTEXT, caminho_pdf, caminho_txt], check=True)
+                    with open(caminho_txt, "r", encoding="utf-8") as f:
+                        texto = f.read()
+                with _etapa(m, "parsing"):
+                    dados = self.extrair_dados(texto)
 
-            df = df[self.colunas_modelo]
-            return df
+            if dados and chave_cache:
+                with _etapa(m, "gravar_cache"):
+                    self.cache.gravar(chave_cache, dados)
+            if m is not None:
+                m.contar_colunas(dados)
+            return dados
 
+        except JobCancelado:
+            raise
         except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Erro ao extrair texto do PDF: {e}")
+            raise RuntimeError(f"Erro ao extrair texto do PDF: {e}") from e
         except Exception as e:
-            raise RuntimeError(f"Erro ao processar PDF: {e}")
+            raise RuntimeError(f"Erro ao processar PDF: {e}") from e
+
+    def processar_pdf(self, caminho_pdf: str, pdftotext_path: Optional[str] = None,
+                      streaming: bool = True, workers: int = 1, usar_cache: bool = True) -> Optional[pd.DataFrame]:
+        """Como extrair_linhas_pdf, mas devolve um DataFrame nas colunas do modelo (None se vazio)."""
+        dados = self.extrair_linhas_pdf(caminho_pdf, pdftotext_path=pdftotext_path, streaming=streaming,
+                                        workers=workers, usar_cache=usar_cache)
+        if not dados:
+            return None
+        return self._montar_dataframe(dados)
+
+    def _montar_dataframe(self, dados: TabelaUnidades) -> pd.DataFrame:
+        # a tabela já tem todas as colunas do modelo, na ordem
+        return dados.dataframe()
 
     def salvar_excel(self, df: pd.DataFrame, nome_arquivo: str = "relatorio_unidades_final.xlsx") -> str:
         if not self.pasta_saida:
@@ -424,33 +1987,749 @@ class ExtractorPDF:
             df.to_excel(caminho_completo, index=False)
             return caminho_completo
         except Exception as e:
-            raise RuntimeError(f"Erro ao salvar Excel: {e}")
+            raise RuntimeError(f"Erro ao salvar Excel: {e}") from e
+
+    def salvar_linhas(self, dados, nome_base: str, formato: str = "xlsx",
+                      colunas_extras: Optional[List[str]] = None) -> str:
+        """
+        Grava as linhas extraídas direto no escritor do formato (xlsx, csv ou
+        parquet), nas colunas do modelo, sem montar DataFrame. `dados` é uma
+        TabelaUnidades ou linhas (listas) já na ordem colunas_extras + modelo.
+        `nome_base` é o nome do arquivo sem extensão.
+        """
+        if not self.pasta_saida:
+            raise ValueError("Pasta de saída não configurada. Use configurar_pasta_saida() primeiro.")
+        colunas = (colunas_extras or []) + self.colunas_modelo
+        escritor, concluido = None, False
+        try:
+            escritor = abrir_escritor(formato, os.path.join(self.pasta_saida, nome_base), colunas)
+            for linha in (dados.linhas() if isinstance(dados, TabelaUnidades) else dados):
+                escritor.escrever(linha)
+            escritor.fechar()
+            concluido = True
+            return escritor.caminho
+        except Exception as e:
+            raise RuntimeError(f"Erro ao salvar {formato.upper()}: {e}") from e
+        finally:
+            # falha no meio: não deixa um arquivo truncado com o nome da saída
+            if escritor is not None and not concluido:
+                escritor.descartar()
+
+
+    # ----------------- lote -----------------
+
+    def _processar_arquivo_lote(self, caminho_pdf: str, nome_base: str, pdftotext_path: Optional[str],
+                                usar_cache: bool, formato: str) -> Tuple[dict, Optional[TabelaUnidades], Optional[dict]]:
+        """
+        Processa um PDF do lote (em uma cópia do extrator); erros viram status
+        no resumo em vez de exceção. Devolve também as métricas só deste PDF.
+        """
+        if self.metricas is not None:
+            self.configurar_metricas()
+        inicio = time.perf_counter()
+        resumo = {"arquivo": caminho_pdf, "status": "ok", "unidades": 0, "saida": None, "erro": None}
+        dados = None
+        try:
+            dados = self.extrair_linhas_pdf(caminho_pdf, pdftotext_path=pdftotext_path, usar_cache=usar_cache)
+            if not dados:
+                resumo["status"] = "vazio"
+                dados = None
+            else:
+                resumo["unidades"] = len(dados)
+                with _etapa(self.metricas, "salvar"):
+                    resumo["saida"] = self.salvar_linhas(dados, nome_base, formato)
+        except Exception as e:
+            resumo["status"] = "erro"
+            resumo["erro"] = str(e)
+            dados = None
+        resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+        return resumo, dados, self.metricas.como_dict() if self.metricas is not None else None
+
+    def processar_lote(self, caminhos_pdf: List[str], workers: int = 1, pdftotext_path: Optional[str] = None,
+                       usar_cache: bool = True, formato: str = "xlsx") -> dict:
+        """
+        Processa vários PDFs (até `workers` ao mesmo tempo) gravando uma saída
+        por arquivo, a consolidada (com a coluna COLUNA_ARQUIVO_ORIGEM) e o
+        resumo JSON com status e tempo de cada arquivo. Um PDF com erro não
+        interrompe os demais.
+        """
+        if not self.pasta_saida:
+            raise ValueError("Pasta de saída não configurada. Use configurar_pasta_saida() primeiro.")
+        inicio = time.perf_counter()
+
+        # <nome do pdf>.<formato>, com sufixo quando dois PDFs têm o mesmo nome
+        tarefas, usados = [], set()
+        for caminho in caminhos_pdf:
+            base = os.path.splitext(os.path.basename(caminho))[0]
+            nome, n = base, 1
+            while nome.lower() in usados:
+                n += 1
+                nome = f"{base}_{n}"
+            usados.add(nome.lower())
+            tarefas.append((caminho, nome, pdftotext_path, usar_cache, formato))
+
+        if workers > 1 and len(tarefas) > 1:
+            with _abrir_pool(workers, self) as pool:
+                resultados = list(pool.map(_processar_arquivo_lote, tarefas))
+        else:
+            resultados = [copy.copy(self)._processar_arquivo_lote(*t) for t in tarefas]
+        if self.metricas is not None:
+            for _, _, metricas in resultados:
+                self.metricas.mesclar(metricas)
+        resultados = [(r, dados) for r, dados, _ in resultados]
+
+        resumo = {
+            "arquivos": [r for r, _ in resultados],
+            "total": len(resultados),
+            "ok": sum(1 for r, _ in resultados if r["status"] == "ok"),
+            "vazios": sum(1 for r, _ in resultados if r["status"] == "vazio"),
+            "erros": sum(1 for r, _ in resultados if r["status"] == "erro"),
+            "consolidado": None,
+        }
+
+        if any(dados for _, dados in resultados):
+            linhas = (
+                (os.path.basename(r["arquivo"]),) + linha
+                for r, dados in resultados if dados
+                for linha in dados.linhas()
+            )
+            with _etapa(self.metricas, "salvar_consolidado"):
+                resumo["consolidado"] = self.salvar_linhas(linhas, NOME_CONSOLIDADO_LOTE, formato,
+                                                           colunas_extras=[COLUNA_ARQUIVO_ORIGEM])
+
+        resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+        caminho_resumo = os.path.join(self.pasta_saida, NOME_RESUMO_LOTE)
+        with open(caminho_resumo, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        resumo["resumo"] = caminho_resumo
+        return resumo
+
+    # ----------------- por condomínio -----------------
+
+    def _processar_condominio(self, caminho_txt: str, condominio: dict, nome_base: str,
+                              formato: str) -> Tuple[dict, Optional[dict]]:
+        """
+        Extrai e grava um condomínio (em uma cópia do extrator), a partir dos
+        trechos dele no texto mapeado. Devolve o resumo e as métricas só dele.
+        """
+        if self.metricas is not None:
+            self.configurar_metricas()
+        self.codigo_condominio = condominio["codigo"]
+        # o scanner lê o código do extrator dele: cópia ligada a esta cópia do extrator
+        self.scanner = copy.copy(self.scanner)
+        self.scanner.extrator = self
+        inicio = time.perf_counter()
+        resumo = {k: condominio[k] for k in ("codigo", "nome", "cnpj")}
+        resumo.update({"status": "ok", "unidades": 0, "saida": None, "erro": None})
+        try:
+            with TextoMapeado(caminho_txt) as texto:
+                blocos = itertools.chain.from_iterable(
+                    self._iterar_blocos_mapeados(texto, a, b) for a, b in condominio["trechos"]
+                )
+                with _etapa(self.metricas, "parsing"):
+                    dados = self.extrair_dados_blocos(blocos)
+            if not dados:
+                resumo["status"] = "vazio"
+            else:
+                resumo["unidades"] = len(dados)
+                if self.metricas is not None:
+                    self.metricas.contar_colunas(dados)
+                with _etapa(self.metricas, "salvar"):
+                    resumo["saida"] = self.salvar_linhas(dados, f"{nome_base}_{condominio['sufixo']}", formato)
+        except JobCancelado:
+            raise
+        except Exception as e:
+            resumo["status"] = "erro"
+            resumo["erro"] = str(e)
+        resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+        return resumo, self.metricas.como_dict() if self.metricas is not None else None
+
+    def processar_por_condominio(self, caminho_pdf: str, workers: int = 1, pdftotext_path: Optional[str] = None,
+                                 formato: str = "xlsx", nome_base: str = NOME_SAIDA_PADRAO) -> dict:
+        """
+        Relatório com vários condomínios: o texto do pdftotext vai para um
+        arquivo temporário mapeado em memória, os limites de cada condomínio
+        saem de uma passada pelos cabeçalhos de página e cada condomínio é
+        extraído de forma independente (até `workers` ao mesmo tempo), com o
+        "Cód. Condomínio" do cabeçalho, em <nome_base>_<código>.<formato>.
+        O resumo JSON (NOME_RESUMO_CONDOMINIOS) traz código, nome, CNPJ,
+        unidades e saída de cada um; um condomínio com erro não interrompe os demais.
+        """
+        if not self.colunas_modelo:
+            raise ValueError("Modelo não configurado. Use configurar_modelo() primeiro.")
+        if not self.pasta_saida:
+            raise ValueError("Pasta de saída não configurada. Use configurar_pasta_saida() primeiro.")
+        if not os.path.exists(caminho_pdf):
+            raise FileNotFoundError(f"PDF não encontrado: {caminho_pdf}")
+        m = self.metricas
+        inicio = time.perf_counter()
+
+        with _etapa(m, "resolver_pdftotext"):
+            exe = _resolver_pdftotext(pdftotext_path)
+        descritor, caminho_txt = tempfile.mkstemp(suffix=".txt")
+        os.close(descritor)
+        try:
+            with _etapa(m, "pdftotext"):
+                subprocess.run([exe, *OPCOES_PDFTOTEXT, caminho_pdf, caminho_txt], check=True)
+            with _etapa(m, "condominios"):
+                with TextoMapeado(caminho_txt) as texto:
+                    condominios = texto.condominios(self.scanner.re_condominio_bytes)
+
+            tarefas = [(caminho_txt, c, nome_base, formato) for c in condominios]
+            if workers > 1 and len(tarefas) > 1:
+                with _abrir_pool(min(workers, len(tarefas)), self._copia_para_pool()) as pool:
+                    resultados = []
+                    for resultado in pool.map(_processar_condominio, tarefas):
+                        resultados.append(resultado)
+                        if self.progresso is not None:
+                            self.progresso.contar_unidades(resultado[0]["unidades"])
+            else:
+                resultados = [copy.copy(self)._processar_condominio(*t) for t in tarefas]
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Erro ao extrair texto do PDF: {e}") from e
+        finally:
+            if os.path.exists(caminho_txt):
+                os.remove(caminho_txt)
+
+        if m is not None:
+            for _, metricas in resultados:
+                m.mesclar(metricas)
+        condominios = [r for r, _ in resultados]
+        resumo = {
+            "arquivo": caminho_pdf,
+            "condominios": condominios,
+            "total": len(condominios),
+            "ok": sum(1 for r in condominios if r["status"] == "ok"),
+            "vazios": sum(1 for r in condominios if r["status"] == "vazio"),
+            "erros": sum(1 for r in condominios if r["status"] == "erro"),
+            "unidades": sum(r["unidades"] for r in condominios),
+            "segundos": round(time.perf_counter() - inicio, 3),
+        }
+        caminho_resumo = os.path.join(self.pasta_saida, NOME_RESUMO_CONDOMINIOS)
+        with open(caminho_resumo, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        resumo["resumo"] = caminho_resumo
+        return resumo
+
+
+# ----------------- execução (CLI e worker residente) -----------------
+
+def executar_pedido(pedido: dict, extrator: Optional[ExtractorPDF] = None,
+                    progresso: Optional[ProgressoJob] = None) -> Tuple[int, str]:
+    """
+    Executa uma extração descrita por `pedido` (pdf, modelo, config, saida e,
+    opcionais, pdftotext, streaming, mmap, workers, formato, nome_arquivo sem
+    extensão) e devolve
+    (código de saída, mensagem) no formato impresso pela CLI. O cache só é
+    usado quando cache_dir é informado; com `metricas` (caminho .json), grava
+    as métricas por campo e por etapa, também quando a extração falha; com
+    `incremental` (caminho do índice), grava também <nome_arquivo>_delta.json.
+    `progresso` é usado pelos jobs (ver executar_job). Com `por_condominio`,
+    grava uma saída por condomínio (ver processar_por_condominio).
+    """
+    metricas = MetricasExtracao() if pedido.get("metricas") else None
+    try:
+        with _etapa(metricas, "carregar_modelo"):
+            if extrator is None:
+                extrator = ExtractorPDF(config_path=pedido["config"])
+                extrator.configurar_modelo(pedido["modelo"])
+        extrator.metricas = metricas
+        extrator.progresso = progresso
+        extrator.configurar_incremental(pedido.get("incremental"))
+        extrator.configurar_pasta_saida(pedido["saida"])
+        if pedido.get("cache_dir"):
+            extrator.configurar_cache(pedido["cache_dir"])
+
+        if pedido.get("por_condominio"):
+            resumo = extrator.processar_por_condominio(
+                pedido["pdf"], workers=pedido.get("workers", 1), pdftotext_path=pedido.get("pdftotext"),
+                formato=pedido.get("formato", "xlsx"), nome_base=pedido.get("nome_arquivo", NOME_SAIDA_PADRAO)
+            )
+            if not resumo["unidades"]:
+                return 1, "ERRO: Nenhum dado foi extraído do PDF."
+            if resumo["erros"]:
+                return 1, (f"ERRO: {resumo['erros']} de {resumo['total']} condomínios falharam. "
+                           f"Resumo em: {resumo['resumo']}")
+            return 0, f"OK: {resumo['ok']} condomínios extraídos. Resumo em: {resumo['resumo']}"
+
+        dados = extrator.extrair_linhas_pdf(pedido["pdf"], pdftotext_path=pedido.get("pdftotext"),
+                                            streaming=pedido.get("streaming", True),
+                                            mapear_texto=pedido.get("mmap", False),
+                                            workers=pedido.get("workers", 1),
+                                            usar_cache=pedido.get("cache", True))
+        if not dados:
+            return 1, "ERRO: Nenhum dado foi extraído do PDF."
+        nome_arquivo = pedido.get("nome_arquivo", NOME_SAIDA_PADRAO)
+        with _etapa(metricas, "salvar"):
+            caminho_saida = extrator.salvar_linhas(dados, nome_arquivo, pedido.get("formato", "xlsx"))
+        if extrator.incremental is not None:
+            extrator.incremental.salvar_delta(os.path.join(pedido["saida"], nome_arquivo + SUFIXO_DELTA))
+        return 0, f"OK: Dados extraídos e salvos em: {caminho_saida}"
+    except Exception as e:
+        return 1, f"ERRO: {str(e)}"
+    finally:
+        if metricas is not None:
+            try:
+                metricas.salvar(pedido["metricas"])
+            except OSError:
+                pass  # métricas são diagnóstico: não mudam o resultado da extração
+
+
+# ----------------- jobs (extração em segundo plano) -----------------
+
+def _agora_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def gravar_status_job(pasta_job: str, status: dict):
+    """Grava status.json do job de forma atômica (quem lê nunca vê o arquivo pela metade)."""
+    caminho = os.path.join(pasta_job, ARQUIVO_STATUS_JOB)
+    # temporário por processo/thread: dois escritores nunca trocam o arquivo um do outro
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def ler_status_job(pasta_job: str) -> dict:
+    with open(os.path.join(pasta_job, ARQUIVO_STATUS_JOB), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def limpar_jobs(pasta_estado: str, ttl_horas: float = TTL_JOBS_HORAS) -> int:
+    """
+    Apaga os jobs de `pasta_estado` terminados (STATUS_FINAIS_JOB) há mais de
+    `ttl_horas`: a pasta de estado e a pasta de saída. Devolve quantos apagou.
+    """
+    if not os.path.isdir(pasta_estado):
+        return 0
+    limite = time.time() - ttl_horas * 3600
+    apagados = 0
+    for entrada in os.scandir(pasta_estado):
+        if not entrada.is_dir():
+            continue
+        try:
+            # o status.json é regravado no fim do job: o mtime dele é a hora do término
+            terminado = os.path.getmtime(os.path.join(entrada.path, ARQUIVO_STATUS_JOB))
+            status = ler_status_job(entrada.path)
+        except (OSError, ValueError):
+            continue
+        if status.get("status") not in STATUS_FINAIS_JOB or terminado > limite:
+            continue
+        try:
+            with open(os.path.join(entrada.path, ARQUIVO_PEDIDO_JOB), "r", encoding="utf-8") as f:
+                saida = json.load(f)["saida"]
+        except (OSError, ValueError, KeyError):
+            saida = None
+        # só a pasta de saída do próprio job (<saida>/jobs/<id>)
+        if saida and os.path.basename(os.path.normpath(saida)) == entrada.name:
+            shutil.rmtree(saida, ignore_errors=True)
+        shutil.rmtree(entrada.path, ignore_errors=True)
+        apagados += 1
+    return apagados
+
+
+def enviar_job(pedido: dict, caminho_socket: Optional[str] = None,
+               pasta_estado: str = PASTA_ESTADO_JOBS_PADRAO) -> Tuple[str, str]:
+    """
+    Cria a pasta do job em `pasta_estado` (pedido, status, log, pid, métricas e
+    cancelamento) e a pasta da saída em <saida>/jobs/<id>/, que só recebe a
+    planilha: <saida> pode ser servida pela web. Dispara executar_job num
+    processo separado, sem esperar; o pid dele fica em ARQUIVO_PID_JOB (quem
+    acompanha o job detecta se morreu). Com `caminho_socket`, o job usa o
+    worker residente quando houver um rodando. Antes, apaga os jobs terminados
+    há mais de TTL_JOBS_HORAS (ver limpar_jobs). Devolve (id do job, pasta do job).
+    """
+    _criar_pasta_privada(pasta_estado)
+    limpar_jobs(pasta_estado)
+    job_id = uuid.uuid4().hex
+    pasta_job = os.path.join(pasta_estado, job_id)
+    os.makedirs(pasta_job, mode=0o700)
+    saida = os.path.join(pedido["saida"], PASTA_JOBS, job_id)
+    os.makedirs(saida)
+    pedido = dict(pedido, saida=saida, socket=caminho_socket,
+                  metricas=pedido.get("metricas") or os.path.join(pasta_job, ARQUIVO_METRICAS_JOB))
+    with open(os.path.join(pasta_job, ARQUIVO_PEDIDO_JOB), "w", encoding="utf-8") as f:
+        json.dump(pedido, f, ensure_ascii=False)
+    gravar_status_job(pasta_job, {"id": job_id, "status": "fila", "pdf": os.path.basename(pedido["pdf"]),
+                                  "criado": _agora_iso()})
+
+    # processo desanexado: sobrevive ao fim da CLI (e da requisição PHP que a chamou)
+    if os.name == "nt":
+        opcoes = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        opcoes = {"start_new_session": True}
+    script = os.path.abspath(__file__)
+    with open(os.path.join(pasta_job, ARQUIVO_LOG_JOB), "wb") as log:
+        proc = subprocess.Popen([sys.executable, script, "--executar-job", pasta_job], cwd=os.path.dirname(script),
+                                stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **opcoes)
+    with open(os.path.join(pasta_job, ARQUIVO_PID_JOB), "w") as f:
+        f.write(str(proc.pid))
+    return job_id, pasta_job
+
+
+def executar_job(pasta_job: str) -> Tuple[int, str]:
+    """
+    Executa o pedido do job gravando o progresso em status.json; o status final
+    é "concluido" (com o caminho da saída), "erro" ou "cancelado". Com um worker
+    residente no socket do pedido, a extração roda nele (que grava o progresso
+    e atende o cancelamento da mesma forma) e este processo só espera.
+    """
+    with open(os.path.join(pasta_job, ARQUIVO_PEDIDO_JOB), "r", encoding="utf-8") as f:
+        pedido = json.load(f)
+    caminho_socket = pedido.pop("socket", None)
+    status = ler_status_job(pasta_job)
+    status.update({"status": "executando", "pid": os.getpid(), "inicio": _agora_iso()})
+
+    # total de páginas para o percentual e o ETA; sem pdfinfo, só as contagens
+    total_paginas = None
+    try:
+        pdfinfo = _resolver_pdfinfo(_resolver_pdftotext(pedido.get("pdftotext")))
+        if pdfinfo:
+            total_paginas = _contar_paginas(pdfinfo, pedido["pdf"])
+    except (OSError, RuntimeError, subprocess.CalledProcessError):
+        pass
+
+    progresso = ProgressoJob(pasta_job, status, total_paginas)
+    try:
+        progresso.atualizar(forcar=True)
+        resultado = None
+        if caminho_socket:
+            resultado = _enviar_ao_worker(caminho_socket, dict(pedido, job=pasta_job, total_paginas=total_paginas))
+        if resultado is None:
+            codigo, mensagem = executar_pedido(pedido, progresso=progresso)
+        else:
+            codigo, mensagem = resultado
+            # contagens gravadas pelo worker
+            gravado = ler_status_job(pasta_job)
+            progresso.paginas, progresso.unidades = gravado.get("paginas", 0), gravado.get("unidades", 0)
+    except JobCancelado as e:
+        codigo, mensagem = 1, f"ERRO: {str(e)}"
+
+    progresso.preencher_status(concluido=codigo == 0)
+    if codigo == 0:
+        status["status"] = "concluido"
+        if pedido.get("por_condominio"):
+            status["saida"] = os.path.join(pedido["saida"], NOME_RESUMO_CONDOMINIOS)
+        else:
+            extensao = ESCRITORES[pedido.get("formato", "xlsx")].extensao
+            status["saida"] = os.path.join(pedido["saida"], pedido.get("nome_arquivo", NOME_SAIDA_PADRAO) + extensao)
+    elif os.path.exists(os.path.join(pasta_job, ARQUIVO_CANCELAR_JOB)):
+        status["status"] = "cancelado"
+    else:
+        status["status"] = "erro"
+    status.update({"mensagem": mensagem, "fim": _agora_iso()})
+    gravar_status_job(pasta_job, status)
+    return codigo, mensagem
+
+
+def cancelar_job(pasta_job: str) -> str:
+    """Pede o cancelamento: o job para na próxima atualização de progresso."""
+    if not os.path.exists(os.path.join(pasta_job, ARQUIVO_STATUS_JOB)):
+        raise FileNotFoundError(f"Job não encontrado: {pasta_job}")
+    open(os.path.join(pasta_job, ARQUIVO_CANCELAR_JOB), "w").close()
+    return ler_status_job(pasta_job)["status"]
+
+
+# extratores de cada processo do worker residente, por (config, modelo)
+_EXTRATORES_SERVIDOR = {}
+
+
+def _extrator_servidor(config_path: str, modelo_path: str) -> ExtractorPDF:
+    """ExtractorPDF carregado neste processo; config/modelo alterados em disco são recarregados."""
+    versao = (os.path.getmtime(config_path), os.path.getmtime(modelo_path))
+    item = _EXTRATORES_SERVIDOR.get((config_path, modelo_path))
+    if item is None or item[0] != versao:
+        extrator = ExtractorPDF(config_path=config_path)
+        extrator.configurar_modelo(modelo_path)
+        item = (versao, extrator)
+        _EXTRATORES_SERVIDOR[(config_path, modelo_path)] = item
+    # cópia rasa: pasta_saida é por pedido, o resto é compartilhado
+    return copy.copy(item[1])
+
+
+def _inicializar_processo_servidor(aquecer: Optional[Tuple[str, str]]):
+    import pandas  # noqa: F401  (aquece o import)
+    if aquecer:
+        try:
+            _extrator_servidor(*aquecer)
+        except Exception:
+            pass  # o erro volta no primeiro pedido com esse config/modelo (um initializer com erro quebra o pool)
+
+
+def _atender_pedido(pedido: dict) -> Tuple[int, str]:
+    """Executa um pedido do worker residente (num processo do pool dele)."""
+    extrator = _extrator_servidor(pedido["config"], pedido["modelo"])
+    progresso = None
+    if pedido.get("job"):
+        # job repassado por executar_job: o progresso vai para a pasta dele
+        progresso = ProgressoJob(pedido["job"], ler_status_job(pedido["job"]), pedido.get("total_paginas"))
+    codigo, mensagem = executar_pedido(pedido, extrator, progresso)
+    if progresso is not None:
+        # contagens finais (a última gravação pode ter sido pulada pelo intervalo)
+        progresso.preencher_status()
+        gravar_status_job(progresso.pasta_job, progresso.status)
+    return codigo, mensagem
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class _TratadorPedido(socketserver.StreamRequestHandler):
+        """Uma conexão = um pedido JSON (uma linha) e uma resposta JSON (uma linha)."""
+
+        def handle(self):
+            linha = self.rfile.readline()
+            if not linha:
+                return  # conexão só de teste (ver servir)
+            try:
+                pedido = json.loads(linha)
+                codigo, mensagem = self.server.pool.submit(_atender_pedido, pedido).result()
+            except Exception as e:
+                codigo, mensagem = 1, f"ERRO: {str(e)}"
+            resposta = json.dumps({"codigo": codigo, "mensagem": mensagem}, ensure_ascii=False)
+            self.wfile.write((resposta + "\n").encode("utf-8"))
+
+    class _ServidorExtracao(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """
+        Worker residente: cada conexão tem uma thread, que só espera o pedido
+        ser executado em `pool` (processos com ExtractorPDF em memória, ver
+        _extrator_servidor). A extração é CPU-bound e não roda nas threads,
+        onde o GIL serializaria os pedidos; no máximo `processos` pedidos
+        rodam ao mesmo tempo, os demais esperam na fila do pool.
+        """
+        daemon_threads = True
+
+        def __init__(self, caminho_socket: str, pool: ProcessPoolExecutor):
+            super().__init__(caminho_socket, _TratadorPedido)
+            self.pool = pool
+
+
+def _socket_confiavel(caminho_socket: str) -> bool:
+    """Socket do usuário atual numa pasta privada: só o próprio usuário pode ter criado o listener."""
+    if not hasattr(os, "getuid"):
+        return False
+    try:
+        info = os.stat(caminho_socket)
+    except OSError:
+        return False
+    return info.st_uid == os.getuid() and _pasta_privada(os.path.dirname(os.path.abspath(caminho_socket)))
+
+
+def _enviar_ao_worker(caminho_socket: str, pedido: dict) -> Optional[Tuple[int, str]]:
+    """
+    Envia o pedido ao worker residente; None se não houver worker respondendo
+    ou se o socket não estiver numa pasta privada do usuário (ver servir).
+    """
+    if not hasattr(socket, "AF_UNIX") or not _socket_confiavel(caminho_socket):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexao:
+            conexao.settimeout(TIMEOUT_CONEXAO_WORKER)
+            conexao.connect(caminho_socket)
+            conexao.settimeout(None)
+            conexao.sendall((json.dumps(pedido) + "\n").encode("utf-8"))
+            with conexao.makefile("rb") as leitor:
+                linha = leitor.readline()
+    except OSError:
+        return None
+    if not linha:
+        return None
+    resposta = json.loads(linha)
+    return resposta["codigo"], resposta["mensagem"]
+
+
+def servir(caminho_socket: str = SOCKET_WORKER_PADRAO, aquecer: Optional[Tuple[str, str]] = None,
+           processos: Optional[int] = None):
+    """
+    Inicia o worker residente no socket Unix `caminho_socket` (bloqueia).
+    `aquecer` = (config, modelo) já carregados antes do primeiro pedido.
+    Os pedidos rodam em até `processos` processos (padrão: os.cpu_count()),
+    iniciados com "spawn" porque o servidor tem uma thread por conexão; esse
+    é o limite de pedidos simultâneos. A pasta do socket é criada com
+    permissão 0700 (e recusada se for de outro usuário ou acessível a outros).
+    """
+    if not hasattr(socketserver, "UnixStreamServer"):
+        raise RuntimeError("Worker residente requer sockets Unix (indisponível nesta plataforma).")
+    if processos is not None and processos < 1:
+        raise ValueError("processos deve ser >= 1")
+    _criar_pasta_privada(os.path.dirname(os.path.abspath(caminho_socket)))
+    if os.path.exists(caminho_socket):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as teste:
+            if teste.connect_ex(caminho_socket) == 0:
+                raise RuntimeError(f"Já existe um worker ativo em {caminho_socket}")
+        os.unlink(caminho_socket)  # socket órfão de uma execução anterior
+
+    pool = ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_inicializar_processo_servidor, initargs=(aquecer,))
+    servidor = _ServidorExtracao(caminho_socket, pool)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if os.path.exists(caminho_socket):
+            os.unlink(caminho_socket)
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Extrai dados de PDF e exporta para XLSX.')
-    parser.add_argument('--pdf', required=True, help='Caminho do PDF de entrada')
-    parser.add_argument('--modelo', required=True, help='Caminho do modelo XLSX (estrutura da planilha de destino)')
-    parser.add_argument('--saida', required=True, help='Pasta de saída para o arquivo XLSX gerado')
-    parser.add_argument('--modelo_nome', required=True, help='Nome do modelo de extração (ex: ahreas)')
+    parser = argparse.ArgumentParser(description='Extrai dados de PDF e exporta para XLSX (ou CSV/Parquet).')
+    parser.add_argument('--pdf', help='Caminho do PDF de entrada')
+    parser.add_argument('--lote', help='Pasta ou padrão glob (ex: "pdfs/*.pdf") para processar vários PDFs')
+    parser.add_argument('--modelo', help='Caminho do modelo XLSX (estrutura da planilha de destino)')
+    parser.add_argument('--saida', help='Pasta de saída para o arquivo XLSX gerado')
+    parser.add_argument('--modelo_nome', help='Nome do modelo de extração (ex: ahreas)')
     parser.add_argument("--pdftotext", help="Caminho do executável pdftotext (opcional).")
+    parser.add_argument("--formato", choices=sorted(ESCRITORES), default="xlsx",
+                        help="Formato da saída: xlsx (padrão), csv ou parquet (requer pyarrow).")
+    parser.add_argument("--salvar-txt", action="store_true",
+                        help="Grava o texto do pdftotext em <saida>/<nome>.txt em vez de ler pelo pipe.")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Grava o texto do pdftotext em arquivo e percorre os blocos com mmap, por offsets "
+                             "(pico de memória constante em relatórios muito grandes).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para extrair intervalos de páginas em paralelo (padrão: 1). "
+                             "Com --lote, quantos PDFs são processados ao mesmo tempo.")
+    parser.add_argument("--servir", action="store_true",
+                        help="Inicia o worker residente no socket (--modelo/--modelo_nome opcionais, para aquecer).")
+    parser.add_argument("--socket", default=SOCKET_WORKER_PADRAO,
+                        help=f"Socket Unix do worker residente (padrão: {SOCKET_WORKER_PADRAO}).")
+    parser.add_argument("--processos", type=int,
+                        help="Pedidos que o worker residente executa ao mesmo tempo, cada um em um processo "
+                             "(padrão: número de núcleos); os demais esperam na fila.")
+    parser.add_argument("--sem-worker", action="store_true",
+                        help="Não usa o worker residente, mesmo que esteja rodando.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR_PADRAO,
+                        help=f"Pasta do cache de resultados (padrão: {CACHE_DIR_PADRAO}).")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Ignora o cache: extrai de novo e não grava o resultado.")
+    parser.add_argument("--limpar-cache", action="store_true",
+                        help="Apaga o cache antes de executar (sem --pdf, só apaga).")
+    parser.add_argument("--incremental", metavar="INDICE",
+                        help="Índice (.json.gz) da extração anterior deste relatório: só reanalisa os blocos "
+                             f"alterados e grava o delta em <saida>/<nome>{SUFIXO_DELTA}.")
+    parser.add_argument("--metricas", "--metrics", metavar="ARQUIVO_JSON",
+                        help="Grava tempo, chamadas, vazios e falhas por campo e por etapa neste JSON.")
+    parser.add_argument("--por-condominio", action="store_true",
+                        help="Relatório com vários condomínios: uma saída por condomínio (<nome>_<código>), "
+                             f"com o código do cabeçalho, e o resumo em <saida>/{NOME_RESUMO_CONDOMINIOS}. "
+                             "--workers condomínios são processados ao mesmo tempo.")
+    parser.add_argument("--job", action="store_true",
+                        help=f"Extrai em segundo plano e retorna na hora com o id do job; a saída fica em "
+                             f"<saida>/{PASTA_JOBS}/<id>/ e o status ({ARQUIVO_STATUS_JOB}), o log e as métricas "
+                             f"em <pasta-jobs>/<id>/.")
+    parser.add_argument("--pasta-jobs", default=PASTA_ESTADO_JOBS_PADRAO,
+                        help=f"Pasta privada com o estado dos jobs, fora da saída (padrão: {PASTA_ESTADO_JOBS_PADRAO}). "
+                             f"Jobs terminados há mais de {TTL_JOBS_HORAS}h são apagados.")
+    parser.add_argument("--cancelar-job", metavar="PASTA_JOB",
+                        help="Cancela o job da pasta informada.")
+    parser.add_argument("--executar-job", metavar="PASTA_JOB", help=argparse.SUPPRESS)
 
     args = parser.parse_args()
 
-    try:
-        config_path = os.path.join("config", f"{args.modelo_nome}.json")
-        extrator = ExtractorPDF(config_path=config_path)
-        extrator.configurar_modelo(args.modelo)
-        extrator.configurar_pasta_saida(args.saida)
+    if args.executar_job:
+        codigo, mensagem = executar_job(args.executar_job)
+        print(mensagem)
+        sys.exit(codigo)
+
+    if args.cancelar_job:
+        try:
+            anterior = cancelar_job(args.cancelar_job)
+        except Exception as e:
+            print(f"ERRO: {str(e)}")
+            sys.exit(1)
+        print(f"OK: Cancelamento pedido (status atual: {anterior}).")
+        sys.exit(0)
 
-        df_resultado = extrator.processar_pdf(args.pdf, pdftotext_path=args.pdftotext)
-        if df_resultado is not None:
-            caminho_excel = extrator.salvar_excel(df_resultado, "relatorio_unidades_extraido.xlsx")
-            print(f"OK: Dados extraídos e salvos em: {caminho_excel}")
+    if args.servir:
+        aquecer = None
+        if args.modelo and args.modelo_nome:
+            aquecer = (os.path.abspath(os.path.join("config", f"{args.modelo_nome}.json")),
+                       os.path.abspath(args.modelo))
+        try:
+            servir(args.socket, aquecer, args.processos)
+        except Exception as e:
+            print(f"ERRO: {str(e)}")
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.limpar_cache:
+        CacheResultados(args.cache_dir).limpar()
+        if not args.pdf:
+            print(f"OK: Cache apagado: {args.cache_dir}")
             sys.exit(0)
-        else:
-            print("ERRO: Nenhum dado foi extraído do PDF.")
+
+    faltando = [f"--{n}" for n in ("modelo", "saida", "modelo_nome") if not getattr(args, n)]
+    if not args.pdf and not args.lote:
+        faltando.insert(0, "--pdf (ou --lote)")
+    if faltando:
+        parser.error("argumentos obrigatórios: " + ", ".join(faltando))
+    if args.lote and args.incremental:
+        parser.error("--incremental não pode ser usado com --lote (o índice é de um relatório)")
+    if args.lote and args.job:
+        parser.error("--job não pode ser usado com --lote")
+    if args.por_condominio and (args.lote or args.incremental):
+        parser.error("--por-condominio não pode ser usado com --lote nem com --incremental")
+
+    if args.lote:
+        try:
+            arquivos = listar_pdfs(args.lote)
+            if not arquivos:
+                print(f"ERRO: Nenhum PDF encontrado em: {args.lote}")
+                sys.exit(1)
+            extrator = ExtractorPDF(config_path=os.path.join("config", f"{args.modelo_nome}.json"))
+            extrator.configurar_modelo(args.modelo)
+            extrator.configurar_pasta_saida(args.saida)
+            if not args.sem_cache:
+                extrator.configurar_cache(args.cache_dir)
+            if args.metricas:
+                extrator.configurar_metricas()
+            resumo = extrator.processar_lote(arquivos, workers=args.workers, pdftotext_path=args.pdftotext,
+                                             formato=args.formato)
+            if args.metricas:
+                extrator.metricas.salvar(args.metricas)
+        except Exception as e:
+            print(f"ERRO: {str(e)}")
             sys.exit(1)
-    except Exception as e:
-        print(f"ERRO: {str(e)}")
-        sys.exit(1)
+        if resumo["erros"]:
+            print(f"ERRO: {resumo['erros']} de {resumo['total']} PDFs falharam. Resumo em: {resumo['resumo']}")
+            sys.exit(1)
+        print(f"OK: {resumo['ok']} de {resumo['total']} PDFs extraídos. Resumo em: {resumo['resumo']}")
+        sys.exit(0)
+
+    # caminhos absolutos: o worker residente pode ter outro diretório de trabalho
+    pedido = {
+        "pdf": os.path.abspath(args.pdf),
+        "modelo": os.path.abspath(args.modelo),
+        "config": os.path.abspath(os.path.join("config", f"{args.modelo_nome}.json")),
+        "saida": os.path.abspath(args.saida),
+        "pdftotext": args.pdftotext,
+        "streaming": not args.salvar_txt,
+        "mmap": args.mmap,
+        "workers": args.workers,
+        "formato": args.formato,
+        "cache_dir": None if args.sem_cache else os.path.abspath(args.cache_dir),
+        "metricas": os.path.abspath(args.metricas) if args.metricas else None,
+        "incremental": os.path.abspath(args.incremental) if args.incremental else None,
+        "por_condominio": args.por_condominio,
+    }
+
+    if args.job:
+        try:
+            job_id, pasta_job = enviar_job(pedido, None if args.sem_worker else args.socket,
+                                           os.path.abspath(args.pasta_jobs))
+        except Exception as e:
+            print(f"ERRO: {str(e)}")
+            sys.exit(1)
+        print(f"OK: Job {job_id} enviado. Status em: {os.path.join(pasta_job, ARQUIVO_STATUS_JOB)}")
+        sys.exit(0)
+
+    resultado = None if args.sem_worker else _enviar_ao_worker(args.socket, pedido)
+    if resultado is None:
+        resultado = executar_pedido(pedido)
+    codigo, mensagem = resultado
+    print(mensagem)
+    sys.exit(codigo)
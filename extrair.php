@@ -4,54 +4,9 @@ auth_require_login();
 app_log('page.view', ['page'=>basename(__FILE__)]);
 
 require_once __DIR__ . '/vendor/autoload.php';
+require_once __DIR__ . '/executar_python.php';
 use PhpOffice\PhpSpreadsheet\IOFactory;
 
-/* ---------- helpers de execução ---------- */
-
-function pick_python_binary(): string {
-  // Permite forçar via env na hospedagem/local
-  $env = getenv('PYTHON_BIN');
-  if ($env) return $env;
-
-  $isWin = stripos(PHP_OS_FAMILY, 'Windows') !== false;
-
-  if ($isWin) {
-    // tenta py -3, py, depois where python3/python
-    $out = @shell_exec('py -3 -V 2>&1');
-    if ($out && stripos($out, 'Python') !== false) return 'py -3';
-    $out = @shell_exec('py -V 2>&1');
-    if ($out && stripos($out, 'Python') !== false) return 'py';
-    foreach (['python3','python'] as $bin) {
-      $w = @shell_exec('where '.$bin.' 2>&1');
-      if ($w && stripos($w, 'Could not find') === false && stripos($w, 'Não foi possível') === false) return $bin;
-    }
-    return 'py -3';
-  } else {
-    foreach (['python3','python'] as $bin) {
-      $p = @shell_exec('which '.$bin.' 2>&1');
-      if ($p && trim($p) !== '') return $bin;
-    }
-    return 'python3';
-  }
-}
-
-function run_cmd(string $cmd, array $env = []): array {
-  $spec = [
-    0 => ['pipe','r'],
-    1 => ['pipe','w'],
-    2 => ['pipe','w'],
-  ];
-  $proc = proc_open($cmd, $spec, $pipes, __DIR__, $env);
-  if (!is_resource($proc)) {
-    return ['exit'=>-1, 'stdout'=>'', 'stderr'=>'proc_open falhou'];
-  }
-  fclose($pipes[0]);
-  $stdout = stream_get_contents($pipes[1]); fclose($pipes[1]);
-  $stderr = stream_get_contents($pipes[2]); fclose($pipes[2]);
-  $exit   = proc_close($proc);
-  return ['exit'=>$exit, 'stdout'=>$stdout, 'stderr'=>$stderr];
-}
-
 /* ---------- helper para mostrar XLSX ---------- */
 
 function exibirPlanilhaComoTabelaHTML($arquivo_xlsx) {
@@ -92,7 +47,9 @@ function exibirPlanilhaComoTabelaHTML($arquivo_xlsx) {
 $err = null;
 $stdout = $stderr = '';
 $exit = 1;
-$pdf_path = $xlsx_gerado = $cmd = '';
+$pdf_path = $xlsx_gerado = $xlsx_url = $cmd = '';
+$job_id = null;
+$job_status = null;
 
 /* ---------- processamento ---------- */
 
@@ -130,7 +87,6 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
       $base        = __DIR__;
       $script      = $base.'/extractor_pdf.py';
       $modelo_path = $base.'/modelo_planilha_importacao.xlsx';
-      $xlsx_gerado = $output_dir.'relatorio_unidades_extraido.xlsx';
       $modelo_nome = $_POST['modelo_nome'] ?? 'ahreas';
 
       if (!file_exists($script))        $err = "Backend Python não encontrado: $script";
@@ -145,6 +101,11 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
           '--saida',       escapeshellarg($output_dir),
           '--modelo_nome', escapeshellarg($modelo_nome)
         ];
+        // job em segundo plano: retorna na hora; só a planilha fica em output/jobs/<id>/,
+        // status, log e métricas ficam em pasta_job() (fora da pasta servida)
+        $args[] = '--job';
+        $args[] = '--pasta-jobs';
+        $args[] = escapeshellarg(pasta_estado_jobs());
         $pdftotext = getenv('POPPLER_PDFTOTEXT') ?: ($_ENV['POPPLER_PDFTOTEXT'] ?? null);
         if (!empty($pdftotext)) {
           $args[] = '--pdftotext';
@@ -161,12 +122,39 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
         $exit   = $res['exit']   ?? 1;
 
         app_log('extract.run', ['cmd'=>$cmd, 'exit'=>$exit]);
-        if ($exit !== 0 || !file_exists($xlsx_gerado)) {
-          $err = "Falha ao gerar XLSX. Veja detalhes abaixo.";
+        if ($exit === 0 && preg_match('/Job ([0-9a-f]{32})/', $stdout, $m)) {
+          header('Location: extrair.php?job=' . $m[1]);
+          exit;
         }
+        $err = "Falha ao iniciar a extração. Veja detalhes abaixo.";
       }
     }
   }
+} elseif (isset($_GET['job'])) {
+  $pasta = pasta_job((string)$_GET['job']);
+  $job_status = $pasta ? json_load($pasta . 'status.json') : [];
+  if ($job_status) $job_status = verificar_processo_job($pasta, $job_status);
+  if (!$job_status) {
+    $err = "Extração não encontrada.";
+  } else {
+    $job_id = $job_status['id'];
+    // métricas registradas uma vez, na primeira visualização do job terminado
+    // (com erro ou cancelado também: as etapas até a falha são gravadas)
+    $metricas_path = $pasta . 'metricas.json';
+    if (in_array($job_status['status'], ['concluido', 'erro', 'cancelado'], true) && file_exists($metricas_path)) {
+      $metricas = json_load($metricas_path);
+      if ($metricas) app_log('extract.metrics', $metricas + ['job'=>$job_id, 'status'=>$job_status['status']]);
+      @unlink($metricas_path);
+    }
+    if ($job_status['status'] === 'concluido') {
+      $xlsx_url    = 'output/jobs/' . $job_id . '/relatorio_unidades_extraido.xlsx';
+      $xlsx_gerado = __DIR__ . '/' . $xlsx_url;
+    } elseif ($job_status['status'] === 'erro') {
+      $err = "Falha ao gerar XLSX. Veja detalhes abaixo.";
+      $stdout = $job_status['mensagem'] ?? '';
+      $stderr = (string)@file_get_contents($pasta . 'job.log');
+    }
+  }
 }
 ?>
 <!DOCTYPE html>
@@ -192,7 +180,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
   <div class="mb-3">
     <a href="index.php" class="btn btn-outline-secondary">⬅️ Voltar</a>
     <?php if ($xlsx_gerado && file_exists($xlsx_gerado) && !$err): ?>
-      <a href="output/relatorio_unidades_extraido.xlsx" class="btn btn-primary ms-2" download>📥 Baixar Planilha XLSX</a>
+      <a href="<?= htmlspecialchars($xlsx_url) ?>" class="btn btn-primary ms-2" download>📥 Baixar Planilha XLSX</a>
     <?php endif; ?>
   </div>
 
@@ -210,6 +198,19 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
         </div>
       </div>
     <?php endif; ?>
+  <?php elseif ($job_status && in_array($job_status['status'], ['fila', 'executando'], true)): ?>
+    <div class="card my-3" id="jobProgresso" data-job="<?= htmlspecialchars($job_id) ?>">
+      <div class="card-body">
+        <h5 class="card-title">⏳ Extraindo <?= htmlspecialchars($job_status['pdf'] ?? '') ?>...</h5>
+        <div class="progress my-3" style="height:24px">
+          <div class="progress-bar progress-bar-striped progress-bar-animated" id="jobBarra" style="width:0%"></div>
+        </div>
+        <p class="mb-3" id="jobTexto">Aguardando início...</p>
+        <button type="button" class="btn btn-outline-danger" id="jobCancelar">Cancelar</button>
+      </div>
+    </div>
+  <?php elseif ($job_status && $job_status['status'] === 'cancelado'): ?>
+    <div class="alert alert-warning">Extração cancelada.</div>
   <?php elseif ($xlsx_gerado && file_exists($xlsx_gerado)): ?>
     <div class="alert alert-success">✅ Extração concluída com sucesso.</div>
     <?php exibirPlanilhaComoTabelaHTML($xlsx_gerado); ?>
@@ -231,6 +232,27 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
 $(function(){
   const $t = $('#tabelaPreview');
   if ($t.length) $t.DataTable({ language:{ url:"//cdn.datatables.net/plug-ins/1.13.6/i18n/pt-BR.json" }});
+
+  // job em andamento: consulta o status até terminar e recarrega a página
+  const $job = $('#jobProgresso');
+  if (!$job.length) return;
+  const id = $job.data('job');
+  function consultar(){
+    $.getJSON('job_extracao.php', { job:id }).done(function(st){
+      if (['concluido','erro','cancelado'].includes(st.status)) { location.reload(); return; }
+      const temPct = st.percentual !== null && st.percentual !== undefined;
+      $('#jobBarra').css('width', (temPct ? st.percentual : 0) + '%').text(temPct ? st.percentual + '%' : '');
+      let txt = (st.unidades ?? 0) + ' unidades';
+      if (st.total_paginas) txt += ' · página ' + (st.paginas ?? 0) + ' de ' + st.total_paginas;
+      if (st.eta_s !== null && st.eta_s !== undefined) txt += ' · faltam ~' + Math.ceil(st.eta_s) + 's';
+      $('#jobTexto').text(txt);
+    }).always(function(){ setTimeout(consultar, 2000); });
+  }
+  consultar();
+  $('#jobCancelar').on('click', function(){
+    $(this).prop('disabled', true).text('Cancelando...');
+    $.post('job_extracao.php', { job:id, acao:'cancelar' });
+  });
 });
 </script>
 </body>
@@ -0,0 +1,27 @@
+<?php
+// Status (GET) e cancelamento (POST acao=cancelar) de um job de extração do extrair.php
+require_once __DIR__ . '/auth/bootstrap.php';
+auth_require_login();
+require_once __DIR__ . '/executar_python.php';
+
+header('Content-Type: application/json; charset=utf-8');
+
+$job_id = (string)($_REQUEST['job'] ?? '');
+$pasta  = pasta_job($job_id);
+$status = $pasta ? json_load($pasta . 'status.json') : [];
+if ($status) $status = verificar_processo_job($pasta, $status);
+if (!$status) {
+    http_response_code(404);
+    echo json_encode(['erro' => 'Extração não encontrada.'], JSON_UNESCAPED_UNICODE);
+    exit;
+}
+
+if ($_SERVER['REQUEST_METHOD'] === 'POST' && ($_POST['acao'] ?? '') === 'cancelar') {
+    // o job verifica este arquivo a cada atualização de progresso
+    @touch($pasta . 'cancelar');
+    app_log('extract.cancel', ['job'=>$job_id]);
+}
+
+// só o que a página precisa (sem caminhos do servidor)
+$campos = ['id', 'status', 'pdf', 'paginas', 'total_paginas', 'unidades', 'percentual', 'eta_s', 'decorrido_s'];
+echo json_encode(array_intersect_key($status, array_flip($campos)), JSON_UNESCAPED_UNICODE);
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from extractor_pdf import ExtractorPDF  # noqa: E402
+
+
+def novo_extrator(**opcoes) -> ExtractorPDF:
+    extrator = ExtractorPDF(config_path=os.path.join(RAIZ, "config", "ahreas.json"), **opcoes)
+    extrator.configurar_modelo(os.path.join(RAIZ, "modelo_planilha_importacao.xlsx"))
+    return extrator
+
+
+@pytest.fixture(scope="module")
+def extrator():
+    return novo_extrator()
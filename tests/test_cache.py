@@ -0,0 +1,34 @@
+"""Cache de resultados: pasta privada e entradas legíveis só pelo usuário."""
+import os
+import stat
+
+import pytest
+
+from benchmark_extractor import gerar_relatorio
+from extractor_pdf import CacheResultados
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="permissões POSIX")
+
+
+def _modo(caminho):
+    return stat.S_IMODE(os.stat(caminho).st_mode)
+
+
+def test_pasta_0700_e_entradas_0600(extrator, tmp_path):
+    pasta = tmp_path / "cache"
+    cache = CacheResultados(str(pasta))
+    dados = extrator.extrair_dados(gerar_relatorio(20, semente=4))
+    cache.gravar("chave", dados)
+    assert _modo(pasta) == 0o700
+    entradas = os.listdir(pasta)
+    assert entradas == ["chave" + CacheResultados.EXTENSAO]
+    assert _modo(pasta / entradas[0]) == 0o600
+    assert list(cache.obter("chave").itens()) == list(dados.itens())
+
+
+def test_recusa_pasta_acessivel_a_outros(tmp_path):
+    pasta = tmp_path / "compartilhada"
+    pasta.mkdir(mode=0o755)
+    os.chmod(pasta, 0o755)
+    with pytest.raises(RuntimeError):
+        CacheResultados(str(pasta))
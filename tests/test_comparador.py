@@ -0,0 +1,94 @@
+"""comparador_planilhas: pareamento por chave e métricas iguais às do PHP (similar_text/levenshtein)."""
+import random
+
+import pandas as pd
+import pytest
+
+from comparador_planilhas import comparar_planilhas, similaridade
+
+# (a, b, % de similar_text($a, $b, $percent)): valores do PHP, inclusive a assimetria
+# quando os argumentos trocam de ordem e a contagem em bytes de caracteres acentuados
+SIMILAR_TEXT_PHP = [
+    ("world", "word", 88.888888888889),
+    ("hello world", "hello world!", 95.652173913043),
+    ("bafoobar", "barfoo", 71.428571428571),
+    ("barfoo", "bafoobar", 42.857142857143),
+    ("ação", "acao", 40.0),
+]
+
+# (a, b, levenshtein($a, $b)): distância em bytes, normalizada pelo maior strlen no comparar.php
+LEVENSHTEIN_PHP = [
+    ("kitten", "sitting", 3),
+    ("flaw", "lawn", 2),
+    ("ação", "acao", 4),
+    ("rua das flores", "r. das flores", 2),
+]
+
+
+@pytest.mark.parametrize("a, b, esperado", SIMILAR_TEXT_PHP)
+def test_similar_text(a, b, esperado):
+    assert similaridade(a, b, "caracteres") == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize("a, b, distancia", LEVENSHTEIN_PHP)
+def test_levenshtein(a, b, distancia):
+    tamanho = max(len(a.encode("utf-8")), len(b.encode("utf-8")))
+    assert similaridade(a, b, "levenshtein") == pytest.approx(100.0 * (1 - distancia / tamanho))
+
+
+@pytest.mark.parametrize("metrica", ["caracteres", "levenshtein"])
+def test_threshold_so_corta_o_que_fica_abaixo(metrica):
+    r = random.Random(7)
+    for _ in range(300):
+        a = "".join(r.choice("abcç ") for _ in range(r.randint(1, 20)))
+        b = "".join(r.choice("abcç ") for _ in range(r.randint(1, 20)))
+        threshold = r.choice([50, 80, 90])
+        exata = similaridade(a, b, metrica)
+        limitada = similaridade(a, b, metrica, threshold)
+        if limitada is None:
+            assert exata < threshold
+        else:
+            assert limitada == pytest.approx(exata)
+
+
+def _planilha(linhas):
+    return pd.DataFrame(linhas, columns=["Cód. Bloco", "Cód. Unidade", "Nome", "Cidade"])
+
+
+def test_pareamento_por_chave():
+    a = _planilha([
+        ["A", "101", "JOÃO DA SILVA", "São Paulo"],
+        ["A", "102", "MARIA SOUZA", "Campinas"],
+        ["B", "7", "ANA LIMA", "Curitiba"],
+        ["B", "7", "PEDRO ALVES", "Curitiba"],
+        ["C", "1", "SÓ EM A", "Moema"],
+    ])
+    b = _planilha([
+        ["A", "0100", "LINHA INSERIDA", "Santos"],
+        ["a ", "0101", "joão da silva ", "São Paulo"],
+        ["A", "0102", "MARIA SOUZA", "Rio de Janeiro"],
+        ["B", "0007", "ANA LIMA", "Curitiba"],
+        ["B", "0007", "PEDRO ALVEZ", "Curitiba"],
+    ])
+    diff = comparar_planilhas(a, b, threshold=90)
+
+    assert diff["somente_a"] == [{"chave": ["C", "0001"], "linha": 6}]
+    assert diff["somente_b"] == [{"chave": ["A", "0100"], "linha": 2}]
+    assert diff["totais"]["pareadas"] == 4
+    # a linha inserida em B não desalinha as seguintes: "joão da silva " é igual após trim/minúsculas
+    # e "ALVES"/"ALVEZ" (90,9%) fica acima do threshold
+    assert diff["linhas"] == [{
+        "chave": ["A", "0102"], "linha_a": 3, "linha_b": 4,
+        "diferencas": {"Cidade": ["Campinas", "Rio de Janeiro", None]},
+    }]
+    assert diff["totais"]["celulas_diferentes"] == 1
+
+
+def test_pareamento_com_workers_igual_ao_serial(monkeypatch):
+    import comparador_planilhas
+    r = random.Random(3)
+    a = _planilha([["A", str(i), f"NOME {r.randint(0, 99)}", "X"] for i in range(300)])
+    b = _planilha([["A", str(i), f"NOME {r.randint(0, 99)}", "Y"] for i in range(300)])
+    serial = comparar_planilhas(a, b, metrica="levenshtein")
+    monkeypatch.setattr(comparador_planilhas, "PARES_POR_LOTE", 20)
+    assert comparar_planilhas(a, b, metrica="levenshtein", workers=2) == serial
@@ -0,0 +1,50 @@
+"""Índice incremental: blocos reemitidos são reaproveitados, qualquer outra mudança é reanalisada."""
+from benchmark_extractor import gerar_relatorio
+from extractor_pdf import IndiceIncremental
+
+BLOCO = ("Bloco: A    Unidade: 0101 - FULANO DE TAL          Código do cliente: 1\n"
+         "Emitido em 01/01/2025 08:00     Página 7\n"
+         "    Celular - (11) 91234 5678\n"
+         "    A/C: MARIA JOSE SILVA              Forma de envio: Email\n")
+
+
+def _reemitir(texto):
+    return (texto.replace("Emitido em 01/01/2025 08:00", "Emitido em 15/03/2025 17:42")
+                 .replace("Página ", "Página  "))
+
+
+def _extrair_incremental(extrator, caminho_indice, *textos):
+    extrator.configurar_incremental(str(caminho_indice))
+    try:
+        return [(dict(extrator.extrair_dados(t).itens()), extrator.incremental) for t in textos]
+    finally:
+        extrator.configurar_incremental(None)
+
+
+def test_hash_ignora_so_as_linhas_de_emissao():
+    assert IndiceIncremental.hash_bloco(BLOCO) == IndiceIncremental.hash_bloco(_reemitir(BLOCO))
+    assert IndiceIncremental.hash_bloco(BLOCO) != IndiceIncremental.hash_bloco(BLOCO.replace("1234 5", "1234  5"))
+    assert IndiceIncremental.hash_bloco(BLOCO) != IndiceIncremental.hash_bloco(BLOCO.replace("MARIA ", "MARIA  "))
+
+
+def test_relatorio_reemitido_reaproveita_blocos(extrator, tmp_path):
+    texto = gerar_relatorio(300, semente=9)
+    (anterior, _), (atual, indice) = _extrair_incremental(extrator, tmp_path / "indice.json.gz",
+                                                          texto, _reemitir(texto))
+    assert indice.reprocessados == 0
+    assert atual == anterior
+
+
+def test_mudanca_so_de_espacos_aparece_no_delta(extrator, tmp_path):
+    # espaços duplos mudam o que os regex capturam: o bloco não pode vir do índice
+    alterado = BLOCO.replace("91234 5678", "91234  5678").replace("MARIA JOSE", "MARIA  JOSE")
+    (antes, _), (depois, indice) = _extrair_incremental(extrator, tmp_path / "indice.json.gz", BLOCO, alterado)
+    colunas = extrator.colunas_modelo
+    esperado = dict(_extrair_incremental(extrator, tmp_path / "outro.json.gz", alterado)[0][0])
+    assert depois == esperado
+    assert indice.reprocessados == 1
+    alteradas = indice.delta["alteradas"]["A_0101"]
+    for coluna in ("Telefones Celular", "Aos Cuidados"):
+        i = colunas.index(coluna)
+        assert antes["A_0101"][i] != depois["A_0101"][i]
+        assert alteradas[coluna] == [antes["A_0101"][i], depois["A_0101"][i]]
@@ -0,0 +1,63 @@
+"""Jobs: estado fora da pasta de saída (servida pela web) e limpeza dos jobs terminados."""
+import json
+import os
+import time
+
+import pytest
+
+from conftest import RAIZ
+from extractor_pdf import (ARQUIVO_LOG_JOB, ARQUIVO_PEDIDO_JOB, ARQUIVO_STATUS_JOB, PASTA_JOBS, STATUS_FINAIS_JOB,
+                           enviar_job, gravar_status_job, ler_status_job, limpar_jobs)
+
+
+def _esperar_fim(pasta_job, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        status = ler_status_job(pasta_job)
+        if status["status"] in STATUS_FINAIS_JOB:
+            return status
+        time.sleep(0.2)
+    pytest.fail("o job não terminou")
+
+
+def _envelhecer(pasta_job, horas):
+    antigo = time.time() - horas * 3600
+    os.utime(os.path.join(pasta_job, ARQUIVO_STATUS_JOB), (antigo, antigo))
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="pastas privadas dependem de uid")
+def test_estado_do_job_fora_da_saida(tmp_path):
+    saida, estado = tmp_path / "output", tmp_path / "estado"
+    pedido = {"pdf": str(tmp_path / "inexistente.pdf"), "saida": str(saida),
+              "config": os.path.join(RAIZ, "config", "ahreas.json"),
+              "modelo": os.path.join(RAIZ, "modelo_planilha_importacao.xlsx")}
+    job_id, pasta_job = enviar_job(pedido, pasta_estado=str(estado))
+
+    assert os.path.dirname(pasta_job) == str(estado)
+    assert os.stat(estado).st_mode & 0o777 == 0o700
+    assert _esperar_fim(pasta_job)["status"] == "erro"
+    for arquivo in (ARQUIVO_PEDIDO_JOB, ARQUIVO_STATUS_JOB, ARQUIVO_LOG_JOB):
+        assert os.path.exists(os.path.join(pasta_job, arquivo))
+    # na pasta servida, só a saída (aqui nenhuma: o PDF não existe)
+    assert os.listdir(saida / PASTA_JOBS / job_id) == []
+
+    _envelhecer(pasta_job, 25)
+    assert limpar_jobs(str(estado)) == 1
+    assert not os.path.exists(pasta_job)
+    assert not os.path.exists(saida / PASTA_JOBS / job_id)
+
+
+def test_limpar_jobs_respeita_ttl_e_jobs_ativos(tmp_path):
+    saida = tmp_path / "output" / PASTA_JOBS
+    for job_id, status, horas in (("a" * 32, "concluido", 1), ("b" * 32, "executando", 48),
+                                  ("c" * 32, "cancelado", 48)):
+        pasta_job = tmp_path / "estado" / job_id
+        pasta_job.mkdir(parents=True)
+        (saida / job_id).mkdir(parents=True)
+        (pasta_job / ARQUIVO_PEDIDO_JOB).write_text(json.dumps({"saida": str(saida / job_id)}))
+        gravar_status_job(str(pasta_job), {"id": job_id, "status": status})
+        _envelhecer(str(pasta_job), horas)
+
+    assert limpar_jobs(str(tmp_path / "estado"), ttl_horas=24) == 1
+    assert sorted(os.listdir(tmp_path / "estado")) == ["a" * 32, "b" * 32]
+    assert sorted(os.listdir(saida)) == ["a" * 32, "b" * 32]
@@ -0,0 +1,93 @@
+"""Extração paralela por intervalos de páginas tem de dar o mesmo resultado da serial."""
+import re
+import sys
+
+import pytest
+
+from benchmark_extractor import gerar_relatorio
+
+# pdftotext/pdfinfo falsos: as páginas são os trechos do texto terminados em \f, e -f/-l
+# escolhem o intervalo como no pdftotext de verdade; cada chamada fica anotada no registro
+PDFTOTEXT_FALSO = """#!{python}
+import sys
+args = sys.argv[1:]
+with open({texto!r}, encoding="utf-8") as f:
+    paginas = f.read().split("\\f")[:-1]
+primeira = int(args[args.index("-f") + 1]) if "-f" in args else 1
+ultima = int(args[args.index("-l") + 1]) if "-l" in args else len(paginas)
+with open({registro!r}, "a") as f:
+    f.write(f"{{primeira}}-{{ultima}}\\n")
+sys.stdout.buffer.write("".join(p + "\\f" for p in paginas[primeira - 1:ultima]).encode("utf-8"))
+"""
+PDFINFO_FALSO = """#!{python}
+with open({texto!r}, encoding="utf-8") as f:
+    print("Pages:", f.read().count("\\f"))
+"""
+
+BLOCOS_POR_PAGINA = 3
+
+
+def _paginar(n_unidades: int, quebra: str) -> str:
+    """
+    Relatório com uma quebra de página a cada BLOCOS_POR_PAGINA blocos, sempre no
+    mesmo ponto do bloco: antes do cabeçalho, logo depois dele ou no meio dele
+    (antes de "Código do cliente"; o cabeçalho casa atravessando o \f). Com
+    "cabecalho_sem_codigo", a quebra vem antes do cabeçalho e o último bloco da
+    página não tem "Código do cliente": o cabeçalho dele só termina no do bloco
+    seguinte, na outra página (e possivelmente em outro intervalo).
+    """
+    corpo = gerar_relatorio(n_unidades).replace("\f", "")
+    inicios = [m.start() for m in re.finditer(r"^Bloco:", corpo, re.MULTILINE)]
+    cortes = []
+    for inicio in inicios[BLOCOS_POR_PAGINA::BLOCOS_POR_PAGINA]:
+        fim_linha = corpo.index("\n", inicio)
+        if quebra in ("antes_do_cabecalho", "cabecalho_sem_codigo"):
+            cortes.append(inicio)
+        elif quebra == "depois_do_cabecalho":
+            cortes.append(fim_linha + 1)
+        else:
+            cortes.append(corpo.index("Código do cliente", inicio, fim_linha))
+    cortes.append(len(corpo))
+    paginas = [corpo[a:b] for a, b in zip([0] + cortes, cortes)]
+    if quebra == "cabecalho_sem_codigo":
+        paginas = [re.sub(r"(?s)(.*^Bloco:[^\n]*?)\s+Código do cliente: \d+", r"\1", p, count=1, flags=re.MULTILINE)
+                   for p in paginas]
+    return "".join(p + "\f" for p in paginas)
+
+
+def _bloco_longo(n_unidades: int) -> str:
+    """Um bloco que ocupa mais de um intervalo inteiro: intervalos sem nenhum cabeçalho."""
+    paginas = _paginar(n_unidades, "antes_do_cabecalho").split("\f")[:-1]
+    meio = len(paginas) // 2
+    extras = [f"    Observação {i}: linha de continuação\n" for i in range(30)]
+    return "".join(p + "\f" for p in paginas[:meio] + extras + paginas[meio:])
+
+
+@pytest.fixture
+def ferramentas(tmp_path):
+    texto, registro = tmp_path / "relatorio.txt", tmp_path / "chamadas.txt"
+    pasta = tmp_path / "poppler"
+    pasta.mkdir()
+    for nome, modelo in (("pdftotext", PDFTOTEXT_FALSO), ("pdfinfo", PDFINFO_FALSO)):
+        exe = pasta / nome
+        exe.write_text(modelo.format(python=sys.executable, texto=str(texto), registro=str(registro)))
+        exe.chmod(0o755)
+    pdf = tmp_path / "relatorio.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n")
+    return texto, registro, str(pasta / "pdftotext"), str(pdf)
+
+
+@pytest.mark.parametrize("quebra", ["antes_do_cabecalho", "depois_do_cabecalho", "dentro_do_cabecalho",
+                                    "cabecalho_sem_codigo", "bloco_longo"])
+def test_paralelo_igual_ao_serial(extrator, ferramentas, quebra):
+    texto, registro, pdftotext, pdf = ferramentas
+    conteudo = _bloco_longo(150) if quebra == "bloco_longo" else _paginar(150, quebra)
+    texto.write_text(conteudo, encoding="utf-8")
+
+    serial = list(extrator.extrair_linhas_pdf(pdf, pdftotext_path=pdftotext, workers=1).itens())
+    registro.write_text("")
+    paralelo = list(extrator.extrair_linhas_pdf(pdf, pdftotext_path=pdftotext, workers=3).itens())
+
+    assert len(registro.read_text().split()) > 1  # vários intervalos -f/-l
+    assert serial
+    assert paralelo == serial
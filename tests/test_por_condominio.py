@@ -0,0 +1,80 @@
+"""processar_por_condominio: uma saída por condomínio, que somadas dão a extração completa."""
+import csv
+import json
+import sys
+
+import pytest
+
+from benchmark_extractor import gerar_relatorio
+from conftest import novo_extrator
+from extractor_pdf import NOME_RESUMO_CONDOMINIOS
+
+# pdftotext falso: copia o texto para o arquivo de saída (ou stdout, com "-")
+PDFTOTEXT_FALSO = """#!{python}
+import shutil, sys
+with open({texto!r}, "rb") as origem:
+    if sys.argv[-1] == "-":
+        shutil.copyfileobj(origem, sys.stdout.buffer)
+    else:
+        with open(sys.argv[-1], "wb") as destino:
+            shutil.copyfileobj(origem, destino)
+"""
+
+CONDOMINIO_GERADO = "000123 - CONDOMÍNIO EDIFÍCIO EXEMPLO          CNPJ: 12.345.678/0001-90"
+
+
+def _trecho(codigo: str, nome: str, cnpj: str, prefixo_bloco: str, n_unidades: int, semente: int) -> str:
+    """Páginas de um condomínio; o prefixo no bloco deixa as chaves distintas entre os trechos."""
+    texto = gerar_relatorio(n_unidades, semente=semente)
+    texto = texto.replace(CONDOMINIO_GERADO, f"{codigo} - {nome}          CNPJ: {cnpj}")
+    return texto.replace("Bloco: ", f"Bloco: {prefixo_bloco}")
+
+
+@pytest.fixture
+def relatorio(tmp_path):
+    # o 000123 volta depois do 000456: dois trechos do mesmo condomínio
+    texto = tmp_path / "relatorio.txt"
+    texto.write_text(
+        _trecho("000123", "CONDOMÍNIO EDIFÍCIO EXEMPLO", "12.345.678/0001-90", "X", 120, 1)
+        + _trecho("000456", "RESIDENCIAL DAS FLORES", "98.765.432/0001-10", "Y", 90, 2)
+        + _trecho("000123", "CONDOMÍNIO EDIFÍCIO EXEMPLO", "12.345.678/0001-90", "Z", 60, 3),
+        encoding="utf-8",
+    )
+    pdftotext = tmp_path / "pdftotext"
+    pdftotext.write_text(PDFTOTEXT_FALSO.format(python=sys.executable, texto=str(texto)))
+    pdftotext.chmod(0o755)
+    pdf = tmp_path / "relatorio.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n")
+    return str(pdf), str(pdftotext)
+
+
+def _ler_csv(caminho):
+    with open(caminho, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_uma_saida_por_condominio(relatorio, tmp_path, workers):
+    pdf, pdftotext = relatorio
+    saida = tmp_path / f"saida_{workers}"
+    extrator = novo_extrator()
+    extrator.configurar_pasta_saida(str(saida))
+    resumo = extrator.processar_por_condominio(pdf, workers=workers, pdftotext_path=pdftotext,
+                                               formato="csv", nome_base="unidades")
+    completo = list(novo_extrator().extrair_linhas_pdf(pdf, pdftotext_path=pdftotext).itens())
+
+    assert [c["codigo"] for c in resumo["condominios"]] == ["000123", "000456"]
+    assert resumo["ok"] == 2 and resumo["erros"] == 0
+    assert sorted(p.name for p in saida.glob("unidades_*.csv")) == ["unidades_000123.csv", "unidades_000456.csv"]
+    with open(saida / NOME_RESUMO_CONDOMINIOS, encoding="utf-8") as f:
+        assert json.load(f)["unidades"] == resumo["unidades"]
+
+    chaves = []
+    for condominio in resumo["condominios"]:
+        linhas = _ler_csv(condominio["saida"])
+        assert len(linhas) == condominio["unidades"]
+        assert {linha["Cód. Condomínio"] for linha in linhas} == {condominio["codigo"]}
+        chaves += [(linha["Cód. Bloco"], linha["Cód. Unidade"]) for linha in linhas]
+    # as saídas somadas têm exatamente as unidades da extração completa
+    assert resumo["unidades"] == len(completo)
+    assert sorted(chaves) == sorted(tuple(chave.split("_")) for chave, _ in completo)
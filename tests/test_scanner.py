@@ -0,0 +1,70 @@
+"""ScannerBloco tem de dar o mesmo resultado das funções extrair_* (implementação de referência)."""
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from benchmark_extractor import gerar_relatorio
+from conftest import RAIZ, novo_extrator
+from extractor_pdf import ExtractorPDF
+
+
+@pytest.fixture(scope="module")
+def referencia():
+    return novo_extrator(usar_scanner=False)
+
+
+def _embaralhar(texto: str, semente: int) -> str:
+    """Tira linhas de campo ao acaso e muda a indentação: blocos com campos ausentes e fora do padrão."""
+    r = random.Random(semente)
+    linhas = []
+    for linha in texto.split("\n"):
+        if linha.startswith("    "):
+            if r.random() < 0.15:
+                continue
+            linha = " " * r.randint(1, 8) + linha.lstrip()
+        linhas.append(linha)
+    return "\n".join(linhas)
+
+
+def _comparar(extrator, referencia, texto):
+    esperado = list(referencia.extrair_dados(texto).itens())
+    assert esperado
+    assert list(extrator.extrair_dados(texto).itens()) == esperado
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_scanner_igual_a_referencia(extrator, referencia, semente):
+    _comparar(extrator, referencia, gerar_relatorio(300, semente=semente))
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_scanner_igual_a_referencia_com_campos_ausentes(extrator, referencia, semente):
+    _comparar(extrator, referencia, _embaralhar(gerar_relatorio(300, semente=100 + semente), semente))
+
+
+def test_mapeamento_para_campo_sem_coluna(tmp_path):
+    """Código do Cliente, Fração Garagem e Fração Extra j só saem com a coluna de mesmo nome no modelo."""
+    with open(f"{RAIZ}/config/ahreas.json", encoding="utf-8") as f:
+        config = json.load(f)
+    config["mapeamento"].update({"Cliente": "Código do Cliente", "Garagem": "Fração Garagem",
+                                 "Extra": "Fração Extra 1", "Outra Extra": "Fração Extra 2"})
+    (tmp_path / "config.json").write_text(json.dumps(config), encoding="utf-8")
+    colunas = ["Cód. Bloco", "Cód. Unidade", "Cliente", "Garagem", "Extra", "Outra Extra", "Fração Extra 2"]
+    pd.DataFrame(columns=colunas).to_excel(tmp_path / "modelo.xlsx", index=False)
+
+    texto = gerar_relatorio(300, semente=9)
+    resultados = []
+    for usar_scanner in (True, False):
+        extrator = ExtractorPDF(config_path=str(tmp_path / "config.json"), usar_scanner=usar_scanner)
+        extrator.configurar_modelo(str(tmp_path / "modelo.xlsx"))
+        resultados.append(list(extrator.extrair_dados(texto).itens()))
+    assert resultados[0] == resultados[1]
+
+    linhas = [linha for _, linha in resultados[0]]
+    for coluna in ("Cliente", "Garagem", "Extra"):
+        assert all(linha[colunas.index(coluna)] == "" for linha in linhas), coluna
+    # "Fração Extra 2" tem coluna própria: chega também à coluna mapeada para ela
+    assert any(linha[colunas.index("Outra Extra")] for linha in linhas)
+    assert all(linha[colunas.index("Outra Extra")] == linha[colunas.index("Fração Extra 2")] for linha in linhas)
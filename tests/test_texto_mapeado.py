@@ -0,0 +1,39 @@
+"""O caminho mapeado (mmap, regex em bytes) tem de achar os mesmos blocos que o caminho em str."""
+import random
+import re
+
+from benchmark_extractor import gerar_relatorio
+
+# espaços que o \s de str aceita e o \s de bytes não
+ESPACOS_UNICODE = [" ", " ", " ", "　", "\x1f"]
+
+
+def _comparar(extrator, texto, tmp_path):
+    caminho = tmp_path / "relatorio.txt"
+    caminho.write_bytes(texto.encode("utf-8"))
+    esperado = list(extrator.extrair_dados(texto).itens())
+    mapeado = list(extrator.extrair_dados_mapeado(str(caminho)).itens())
+    return esperado, mapeado
+
+
+def test_cabecalho_com_espacos_unicode(extrator, tmp_path):
+    r = random.Random(3)
+
+    def espaco():
+        return "".join(r.choice(ESPACOS_UNICODE) for _ in range(r.randint(1, 3)))
+
+    def trocar_espacos(m):
+        bloco, unidade, resto = m.groups()
+        return f"Bloco:{espaco()}{bloco}{espaco()}Unidade:{espaco()}{unidade}{espaco()}-{resto}"
+
+    texto = re.sub(r"^Bloco: (\S+) +Unidade: (\S+) -(.*)$", trocar_espacos, gerar_relatorio(400, semente=5),
+                   flags=re.MULTILINE)
+    esperado, mapeado = _comparar(extrator, texto, tmp_path)
+    assert len(esperado) > 300
+    assert mapeado == esperado
+
+
+def test_relatorio_gerado_igual_ao_caminho_em_str(extrator, tmp_path):
+    esperado, mapeado = _comparar(extrator, gerar_relatorio(500, semente=11), tmp_path)
+    assert esperado
+    assert mapeado == esperado
@@ -0,0 +1,88 @@
+"""Worker residente: pedidos simultâneos pelo socket rodam em processos separados."""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from benchmark_extractor import gerar_relatorio
+from conftest import RAIZ
+from extractor_pdf import _enviar_ao_worker
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requer sockets Unix")
+
+# o pdftotext falso anota o processo que o chamou (o processo do pool que atende o pedido)
+# e segura o pedido um pouco, para que o segundo chegue enquanto o primeiro roda
+PDFTOTEXT_FALSO = """#!{python}
+import os, sys, time
+with open({registro!r}, "a") as f:
+    f.write(f"{{os.getppid()}}\\n")
+time.sleep(1)
+with open({texto!r}, encoding="utf-8") as f:
+    sys.stdout.write(f.read())
+"""
+
+
+@pytest.fixture
+def worker(tmp_path):
+    pasta_socket = tmp_path / "sock"
+    caminho_socket = str(pasta_socket / "extractor.sock")
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "extractor_pdf.py"), "--servir", "--socket", caminho_socket,
+         "--processos", "2"],
+        cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        limite = time.monotonic() + 30
+        while not os.path.exists(caminho_socket):
+            assert processo.poll() is None, "worker terminou antes de abrir o socket"
+            assert time.monotonic() < limite, "worker não abriu o socket"
+            time.sleep(0.1)
+        yield processo, caminho_socket
+    finally:
+        processo.terminate()
+        processo.wait(30)
+
+
+def test_pedidos_simultaneos(worker, tmp_path):
+    processo, caminho_socket = worker
+    texto = tmp_path / "relatorio.txt"
+    texto.write_text(gerar_relatorio(50), encoding="utf-8")
+    registro = tmp_path / "chamadas.txt"
+    pdftotext = tmp_path / "pdftotext"
+    pdftotext.write_text(PDFTOTEXT_FALSO.format(python=sys.executable, registro=str(registro), texto=str(texto)))
+    pdftotext.chmod(0o755)
+    pdf = tmp_path / "relatorio.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n")
+
+    respostas = {}
+
+    def enviar(nome):
+        respostas[nome] = _enviar_ao_worker(caminho_socket, {
+            "pdf": str(pdf), "pdftotext": str(pdftotext), "saida": str(tmp_path / nome), "formato": "csv",
+            "config": os.path.join(RAIZ, "config", "ahreas.json"),
+            "modelo": os.path.join(RAIZ, "modelo_planilha_importacao.xlsx"),
+        })
+
+    threads = [threading.Thread(target=enviar, args=(nome,)) for nome in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(120)
+
+    for nome in ("a", "b"):
+        codigo, mensagem = respostas[nome]
+        assert codigo == 0, mensagem
+        assert mensagem.startswith("OK:")
+    saidas = [sorted(os.listdir(tmp_path / nome)) for nome in ("a", "b")]
+    assert saidas[0] == saidas[1] and saidas[0]
+    conteudos = [(tmp_path / nome / saidas[0][0]).read_bytes() for nome in ("a", "b")]
+    assert conteudos[0] == conteudos[1]
+
+    processos = registro.read_text().split()
+    assert len(processos) == 2
+    assert len(set(processos)) == 2  # cada pedido num processo do pool
+    assert str(processo.pid) not in processos  # e nenhum na thread do servidor